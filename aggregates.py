@@ -0,0 +1,66 @@
+from collections import Counter, defaultdict
+
+ERROR_TYPES = ("conteudo", "atencao", "tempo")
+NO_SUBTOPIC = "Sem subtópico"
+
+
+class AggregateIndex:
+    # Contagens mantidas incrementalmente: cada questão adicionada ou removida
+    # custa O(1), e os gráficos leem direto daqui sem percorrer as questões.
+
+    def __init__(self, questions=()):
+        self.subjects = Counter()
+        self.topics = defaultdict(Counter)
+        self.subtopics = defaultdict(Counter)
+        self.errors = Counter()
+        self.subject_errors = defaultdict(Counter)
+        for q in questions:
+            self.add(q)
+
+    def add(self, question):
+        self._update(question, 1)
+
+    def remove(self, question):
+        self._update(question, -1)
+
+    def _update(self, question, delta):
+        subject = question["subject"]
+        topic = question["topic"]
+        subtopic = question["subtopic"] or NO_SUBTOPIC
+
+        _bump(self.subjects, subject, delta)
+        _bump(self.topics[subject], topic, delta)
+        _bump(self.subtopics[subject], subtopic, delta)
+        erros = question.get("erros") or {}
+        for tipo in ERROR_TYPES:
+            if erros.get(tipo):
+                _bump(self.errors, tipo, delta)
+                _bump(self.subject_errors[subject], tipo, delta)
+
+        # Matéria sem questões some de todas as tabelas
+        if subject not in self.subjects:
+            self.topics.pop(subject, None)
+            self.subtopics.pop(subject, None)
+            self.subject_errors.pop(subject, None)
+
+    def as_dict(self):
+        # Cópia em tipos simples (dict/int), para JSON ou para outro processo
+        return {
+            "total": sum(self.subjects.values()),
+            "subjects": dict(self.subjects),
+            "topics": {s: dict(c) for s, c in self.topics.items()},
+            "subtopics": {s: dict(c) for s, c in self.subtopics.items()},
+            "errors": {tipo: self.errors[tipo] for tipo in ERROR_TYPES},
+            "subject_errors": {s: {tipo: c[tipo] for tipo in ERROR_TYPES} for s, c in self.subject_errors.items()},
+        }
+
+    def sorted_subjects(self):
+        return sorted(self.subjects.items(), key=lambda x: x[1], reverse=True)
+
+
+def _bump(counter, key, delta):
+    value = counter[key] + delta
+    if value > 0:
+        counter[key] = value
+    else:
+        del counter[key]
@@ -0,0 +1,343 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregates import ERROR_TYPES
+from cohort import aggregate_cohort, expand_paths, format_rankings, rankings, write_rankings_csv
+from dataset import DEFAULT_PATH, Dataset, iter_questions, load_index, migrated_path, recommend, resolve_data_path
+from exporter import export_file
+from importer import iter_batches
+from progress import MEASURES, ProgressIndex
+from sqlite_storage import migrate_json
+
+# Linha de comando sem interface gráfica:
+#   python -m autodiagnostico stats enem_data.db outro_aluno.json
+#   python -m autodiagnostico import questoes.csv
+#   python -m autodiagnostico export saida.csv --data enem_data.db
+#   python -m autodiagnostico report alunos/*.json --output relatorio.json
+#   python -m autodiagnostico report enem_data.db --output diagnostico.pdf
+#   python -m autodiagnostico cohort alunos/ --top 20 --output ranking.csv
+#   python -m autodiagnostico migrate enem_data.json --to enem_data.db
+#   python -m autodiagnostico recommend --top 10
+#   python -m autodiagnostico progress --period month
+# Nenhum módulo de tkinter/customtkinter é carregado aqui; o matplotlib (Agg)
+# só nos relatórios com gráficos (HTML, PDF, PNG).
+
+REPORT_EXTENSIONS = {".html": "html", ".htm": "html", ".pdf": "pdf", ".json": "json"}
+CHART_FORMATS = ("html", "pdf", "png")
+
+
+def summarize_file(path):
+    return path, load_index(path).as_dict()
+
+
+def parse_csv_file(path):
+    questions = []
+    for batch, _ in iter_batches(path):
+        questions.extend(batch)
+    return path, questions
+
+
+def run_parallel(function, paths, workers):
+    # Um arquivo por tarefa; com um só arquivo não vale a pena abrir processos
+    if workers == 1 or len(paths) <= 1:
+        return [function(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, paths))
+
+
+def format_summary(path, summary):
+    lines = [f"== {path} ({summary['total']} questões) =="]
+    subjects = sorted(summary["subjects"].items(), key=lambda x: x[1], reverse=True)
+    for subject, count in subjects:
+        lines.append(f"{subject}: {count}")
+    erros = ", ".join(f"{tipo} {summary['errors'][tipo]}" for tipo in ERROR_TYPES)
+    lines.append(f"Erros: {erros}")
+    return "\n".join(lines)
+
+
+def format_report(path, summary):
+    lines = [format_summary(path, summary)]
+    for subject, _ in sorted(summary["subjects"].items(), key=lambda x: x[1], reverse=True):
+        lines.append(f"\n-- {subject} --")
+        for title, key in (("Tópicos", "topics"), ("Subtópicos", "subtopics")):
+            counts = sorted(summary[key][subject].items(), key=lambda x: x[1], reverse=True)
+            lines.append(f"{title}: " + ", ".join(f"{name} ({count})" for name, count in counts))
+        erros = summary["subject_errors"].get(subject, {})
+        lines.append("Erros: " + ", ".join(f"{tipo} {erros.get(tipo, 0)}" for tipo in ERROR_TYPES))
+    return "\n".join(lines)
+
+
+def write_output(text, output):
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def check_files(paths):
+    # Um nome errado seria lido como um arquivo vazio ("0 questões")
+    missing = [path for path in paths if not os.path.exists(path)]
+    for path in missing:
+        print(f"{path} não existe", file=sys.stderr)
+    return not missing
+
+
+def cmd_stats(args):
+    if not check_files(args.files):
+        return 1
+    results = run_parallel(summarize_file, args.files, args.workers)
+    if args.json:
+        write_output(json.dumps(dict(results), ensure_ascii=False, indent=2), args.output)
+    else:
+        write_output("\n\n".join(format_summary(path, summary) for path, summary in results), args.output)
+    return 0
+
+
+def report_format(args):
+    if args.format:
+        return args.format
+    if args.json:
+        return "json"
+    extension = os.path.splitext(args.output or "")[1].lower()
+    return REPORT_EXTENSIONS.get(extension, "text")
+
+
+def cmd_report(args):
+    fmt = report_format(args)
+    if fmt in CHART_FORMATS and not args.output:
+        print("Informe --output para relatórios em HTML, PDF ou PNG", file=sys.stderr)
+        return 1
+    if not check_files(args.files):
+        return 1
+    results = run_parallel(summarize_file, args.files, args.workers)
+    if fmt in CHART_FORMATS:
+        return write_chart_reports(args, fmt, results)
+    if fmt == "json":
+        write_output(json.dumps(dict(results), ensure_ascii=False, indent=2), args.output)
+    else:
+        write_output("\n\n".join(format_report(path, summary) for path, summary in results), args.output)
+    return 0
+
+
+def write_chart_reports(args, fmt, results):
+    from report import DEFAULT_CACHE_DIR, generate_reports
+
+    if args.no_cache:
+        # Cache descartável: todos os gráficos são desenhados de novo
+        cache_dir = tempfile.mkdtemp(prefix="enem_charts_")
+    else:
+        cache_dir = args.cache or DEFAULT_CACHE_DIR
+    try:
+        written, stats = generate_reports(results, args.output, fmt, args.workers, cache_dir)
+    finally:
+        if args.no_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    for path in written:
+        print(f"Relatório gravado em {path}")
+    print(f"{stats['charts']} gráficos: {stats['rendered']} desenhados, {stats['cached']} do cache")
+    return 0
+
+
+def cmd_import(args):
+    # Os CSVs são lidos em paralelo; a gravação no journal fica neste processo
+    dataset = Dataset(args.data).load()
+    total = 0
+    for path, questions in run_parallel(parse_csv_file, args.files, args.workers):
+        dataset.add_many(questions)
+        total += len(questions)
+        print(f"{path}: {len(questions)} questões importadas")
+    dataset.save()
+    print(f"Total: {total} questões importadas em {args.data}")
+    return 0
+
+
+def cmd_export(args):
+    count = export_file(iter_questions(args.data), args.output)
+    print(f"{count} questões exportadas para {args.output}")
+    return 0
+
+
+def cmd_recommend(args):
+    ranked = recommend(args.data, args.top, half_life_days=args.half_life)
+    if args.json:
+        write_output(json.dumps(ranked, ensure_ascii=False, indent=2), args.output)
+        return 0
+    lines = [f"== O que estudar primeiro ({args.data}) =="]
+    for position, item in enumerate(ranked, 1):
+        lines.append(f"{position}. {item['subject']} > {item['topic']} > {item['subtopic']}: "
+                     f"{item['score']:.1f} ({item['questions']} questões)")
+    write_output("\n".join(lines), args.output)
+    return 0
+
+
+def cmd_progress(args):
+    progress = ProgressIndex(iter_questions(args.data))
+    rows = progress.table(args.period, args.subject)
+    if args.last:
+        rows = rows[-args.last:]
+    if args.json:
+        data = [dict(zip(("periodo",) + MEASURES, row)) for row in rows]
+        write_output(json.dumps(data, ensure_ascii=False, indent=2), args.output)
+        return 0
+    unit = "Semana" if args.period == "week" else "Mês"
+    title = args.subject or "todas as matérias"
+    lines = [f"== Progresso de {title} ({args.data}) ==",
+             f"{unit:<12}{'Questões':>10}{'Conteúdo':>10}{'Atenção':>10}{'Tempo':>10}"]
+    lines += [f"{row[0]:<12}" + "".join(f"{value:>10}" for value in row[1:]) for row in rows]
+    write_output("\n".join(lines), args.output)
+    return 0
+
+
+def cmd_migrate(args):
+    if not os.path.exists(args.source):
+        print(f"{args.source} não existe", file=sys.stderr)
+        return 1
+    target = args.to or os.path.splitext(args.source)[0] + ".db"
+    if os.path.exists(target):
+        print(f"{target} já existe; a migração é feita uma vez só", file=sys.stderr)
+        return 1
+    count = migrate_json(args.source, target)
+    print(f"{count} questões migradas de {args.source} para {target}")
+    return 0
+
+
+def cmd_cohort(args):
+    paths = expand_paths(args.paths)
+    if not paths:
+        print("Nenhum arquivo de dados encontrado", file=sys.stderr)
+        return 1
+    merged = aggregate_cohort(paths, args.workers)
+    ranked = rankings(merged, args.top)
+
+    if args.output and args.output.endswith('.csv'):
+        write_rankings_csv(ranked, args.output)
+        print(f"Ranking de {merged['students']} alunos gravado em {args.output}")
+    elif args.json or (args.output and args.output.endswith('.json')):
+        data = {"students": merged["students"], "failed": merged["failed"], "rankings": ranked}
+        write_output(json.dumps(data, ensure_ascii=False, indent=2), args.output)
+    else:
+        write_output(format_rankings(merged, ranked), args.output)
+    return 0
+
+
+def positive_float(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"número inválido: {text}")
+    if not math.isfinite(value) or value <= 0:
+        raise argparse.ArgumentTypeError("deve ser maior que zero")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="autodiagnostico", description="Analisador ENEM sem interface gráfica")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_workers(p):
+        p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="processos em paralelo (padrão: número de núcleos)")
+
+    def add_data(p):
+        p.add_argument("--data", help="arquivo de dados (padrão: o mesmo da janela, enem_data.db, "
+                                      "ou enem_data.json sem SQLite)")
+
+    p = sub.add_parser("stats", help="contagens por matéria e tipo de erro")
+    p.add_argument("files", nargs="+", help="arquivos de dados (enem_data.db ou .json)")
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.add_argument("--output", help="grava a saída neste arquivo")
+    add_workers(p)
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("report", help="relatório por matéria, tópico e subtópico")
+    p.add_argument("files", nargs="+", help="arquivos de dados (enem_data.db ou .json)")
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.add_argument("--format", choices=("text", "json", "html", "pdf", "png"),
+                   help="formato do relatório (padrão: pela extensão de --output)")
+    p.add_argument("--output", help="grava o relatório neste arquivo (pasta, com vários alunos ou PNG)")
+    p.add_argument("--cache", help="pasta do cache de gráficos")
+    p.add_argument("--no-cache", action="store_true", help="desenha todos os gráficos de novo")
+    add_workers(p)
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("cohort", help="ranking de dificuldades de uma turma ou escola")
+    p.add_argument("paths", nargs="+", help="arquivos, diretórios ou padrões glob com os dados dos alunos")
+    p.add_argument("--top", type=int, default=10, help="quantos itens por ranking (0 = todos)")
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.add_argument("--output", help="grava o ranking neste arquivo (.csv, .json ou texto)")
+    add_workers(p)
+    p.set_defaults(func=cmd_cohort)
+
+    p = sub.add_parser("import", help="importa CSVs para um arquivo de dados")
+    p.add_argument("files", nargs="+", help="arquivos CSV (.csv, .csv.gz) ou exportados (.parquet, .arrow, .npz)")
+    add_data(p)
+    add_workers(p)
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="exporta um arquivo de dados para CSV ou formato colunar")
+    p.add_argument("output", help="arquivo de saída (.csv, .csv.gz, .parquet, .arrow ou .npz)")
+    add_data(p)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("recommend", help="tópicos e subtópicos com mais erros ponderados")
+    add_data(p)
+    p.add_argument("--top", type=int, default=10, help="quantos itens mostrar")
+    p.add_argument("--half-life", type=positive_float, help="meia-vida em dias: erros antigos pesam menos")
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.add_argument("--output", help="grava a saída neste arquivo")
+    p.set_defaults(func=cmd_recommend)
+
+    p = sub.add_parser("progress", help="questões e erros por semana ou por mês")
+    add_data(p)
+    p.add_argument("--period", choices=("week", "month"), default="week", help="tamanho de cada período")
+    p.add_argument("--subject", help="só esta matéria")
+    p.add_argument("--last", type=int, help="só os últimos N períodos")
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.add_argument("--output", help="grava a saída neste arquivo")
+    p.set_defaults(func=cmd_progress)
+
+    p = sub.add_parser("migrate", help="copia um arquivo JSON para um banco SQLite")
+    p.add_argument("source", nargs="?", default=DEFAULT_PATH, help=f"arquivo JSON (padrão: {DEFAULT_PATH})")
+    p.add_argument("--to", help="banco de destino (padrão: mesmo nome com .db)")
+    p.set_defaults(func=cmd_migrate)
+
+    return parser
+
+
+def check_data_path(args):
+    # Sem --data, o mesmo arquivo da janela (o banco, migrado na primeira vez).
+    # Um JSON já migrado não é mais lido pela janela: gravar nele perderia as
+    # questões, e lê-lo mostraria dados velhos.
+    if args.data is None:
+        try:
+            args.data = resolve_data_path(DEFAULT_PATH)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return False
+        return True
+    db_path = migrated_path(args.data)
+    if db_path is None:
+        return True
+    if args.func is cmd_import:
+        print(f"{args.data} já foi migrado para {db_path}; use --data {db_path}", file=sys.stderr)
+        return False
+    print(f"Aviso: {args.data} já foi migrado para {db_path}; lendo a cópia antiga", file=sys.stderr)
+    return True
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if hasattr(args, "data") and not check_data_path(args):
+        return 1
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+from aggregates import ERROR_TYPES
+from exporter import write_csv
+
+# Gerador de dados sintéticos parecidos com os reais: poucas matérias e
+# tópicos concentram a maior parte das questões (distribuição de Zipf).
+
+SUBJECTS = ["Física", "Matemática", "Biologia", "Química",
+            "História", "Geografia", "Filosofia", "Sociologia", "Artes", "Literatura"]
+SUBJECT_WEIGHTS = [12, 40, 10, 10, 7, 7, 4, 4, 2, 4]
+ERROR_RATES = {"conteudo": 0.7, "atencao": 0.25, "tempo": 0.15}
+# Datas de cadastro espalhadas por dois anos, em ordem
+START = datetime(2023, 1, 1)
+SPAN_SECONDS = 2 * 365 * 86400
+WORDS = ("questão enunciado gráfico função cálculo célula energia reação equação guerra "
+         "revolução clima relevo texto autor obra razão proporção área volume força "
+         "velocidade tabela interpretação conceito fórmula leitura atenção tempo").split()
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def build_catalog(rng, topics_per_subject=(8, 30), subtopics_per_topic=(2, 12)):
+    catalog = {}
+    for subject in SUBJECTS:
+        topics = []
+        for t in range(rng.randint(*topics_per_subject)):
+            subtopics = [f"Subtópico {t + 1}.{s + 1}" for s in range(rng.randint(*subtopics_per_topic))]
+            topics.append((f"Tópico {t + 1}", subtopics, zipf_weights(len(subtopics))))
+        catalog[subject] = (topics, zipf_weights(len(topics)))
+    return catalog
+
+
+def generate_questions(count, seed=0):
+    rng = random.Random(seed)
+    catalog = build_catalog(rng)
+    subjects = rng.choices(SUBJECTS, SUBJECT_WEIGHTS, k=count)
+    offsets = sorted(rng.random() * SPAN_SECONDS for _ in range(count))
+    questions = []
+    for subject, offset in zip(subjects, offsets):
+        topics, topic_weights = catalog[subject]
+        topic, subtopics, subtopic_weights = rng.choices(topics, topic_weights)[0]
+        # Cerca de 10% das questões ficam sem subtópico
+        subtopic = "" if rng.random() < 0.1 else rng.choices(subtopics, subtopic_weights)[0]
+        description = " ".join(rng.choices(WORDS, k=rng.randint(0, 30))).capitalize()
+        questions.append({
+            "id": "%032x" % rng.getrandbits(128),
+            "subject": subject,
+            "topic": topic,
+            "subtopic": subtopic,
+            "description": description,
+            "erros": {tipo: rng.random() < ERROR_RATES[tipo] for tipo in ERROR_TYPES},
+            "created_at": (START + timedelta(seconds=offset)).astimezone().isoformat(timespec="seconds"),
+        })
+    return questions
+
+
+def write_dataset(questions, filepath):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(questions, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um conjunto sintético de questões")
+    parser.add_argument("count", type=int, help="número de questões")
+    parser.add_argument("--output", default="enem_synthetic.json", help="arquivo de saída (.json ou .csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    questions = generate_questions(args.count, args.seed)
+    if args.output.endswith('.csv'):
+        write_csv(questions, args.output)
+    else:
+        write_dataset(questions, args.output)
+    print(f"{args.count} questões gravadas em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Sem tela: o Matplotlib precisa usar o backend Agg
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from aggregates import AggregateIndex
+from columnar import ColumnarStore
+from core import format_row
+from dataset import Dataset, load_index
+from exporter import export_file, write_csv
+from importer import iter_batches, iter_csv_batches
+from progress import ProgressIndex, downsample
+from sqlite_storage import migrate_json
+
+from benchmarks.generate import generate_questions, write_dataset
+
+# Mede os caminhos quentes do analisador com dados sintéticos e imprime o
+# resultado em JSON, para comparar execuções:
+#   python -m benchmarks.run --sizes 1000 10000 100000 --output bench.json
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+PAGE = 100
+
+
+def measure(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times), "repeat": repeat}
+
+
+def render_topic_charts(index):
+    # Mesmo desenho dos gráficos de tópicos, fora da tela
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from chartstyle import TOPIC_STYLE, draw_bars, figure_height, ordered_counts
+
+    figures = 0
+    for subject, topics in index.topics.items():
+        names, values = ordered_counts(topics)
+        fig = Figure(figsize=(7, figure_height(len(names))))
+        canvas = FigureCanvasAgg(fig)
+        draw_bars(fig.add_subplot(111), names, values, **TOPIC_STYLE)
+        fig.tight_layout()
+        canvas.draw()
+        figures += 1
+    return figures
+
+
+def bench_size(size, workdir, repeat):
+    questions = generate_questions(size, seed=size)
+    data_path = os.path.join(workdir, f"data_{size}.json")
+    csv_path = os.path.join(workdir, f"data_{size}.csv")
+    write_dataset(questions, data_path)
+    write_csv(questions, csv_path)
+
+    results = {}
+    results["load_data"] = measure(lambda: Dataset(data_path, read_only=True).load(), repeat)
+
+    db_path = os.path.join(workdir, f"data_{size}.db")
+    results["migrate_sqlite"] = measure(lambda: migrate_json(data_path, db_path), 1)
+    results["load_data_sqlite"] = measure(lambda: Dataset(db_path, read_only=True).load(), repeat)
+    results["aggregate_groupby_sqlite"] = measure(lambda: load_index(db_path), repeat)
+
+    def save():
+        dataset = Dataset(data_path).load()
+        start = time.perf_counter()
+        dataset.save()
+        return time.perf_counter() - start
+    save_times = [save() for _ in range(repeat)]
+    results["save_data"] = {"min": min(save_times), "median": statistics.median(save_times), "repeat": repeat}
+
+    dataset = Dataset(data_path).load()
+    new_question = dict(questions[0], id=None, erros=dict(questions[0]["erros"]))
+
+    def add_and_delete():
+        question = dataset.add(dict(new_question, id=None))
+        dataset.delete_many([question["id"]])
+    results["add_delete_one"] = measure(add_and_delete, max(repeat, 20))
+    dataset.save()
+
+    store = dataset.questions
+    results["aggregate_full_python"] = measure(lambda: AggregateIndex(store), repeat)
+    results["columnar_build"] = measure(lambda: ColumnarStore.from_questions(store), repeat)
+    columns = ColumnarStore.from_questions(store)
+    results["aggregate_full_columnar"] = measure(columns.to_index, repeat)
+    index = dataset.index
+    results["aggregate_incremental"] = measure(lambda: (index.add(new_question), index.remove(new_question)),
+                                               max(repeat, 20))
+
+    results["progress_build"] = measure(lambda: ProgressIndex(store), repeat)
+    progress = ProgressIndex(store)
+    results["progress_incremental"] = measure(lambda: (progress.add(new_question), progress.remove(new_question)),
+                                              max(repeat, 20))
+    results["progress_series"] = measure(lambda: downsample(*progress.series("week", "conteudo")), max(repeat, 20))
+
+    results["data_view_full"] = measure(lambda: [format_row(q) for q in store], repeat)
+    results["data_view_window"] = measure(lambda: [format_row(store.at(i)) for i in range(min(PAGE, size))],
+                                          max(repeat, 20))
+
+    results["filter_facets"] = measure(lambda: dataset.filter_ids(subject="Matemática", errors=("atencao",)),
+                                       repeat)
+    results["filter_text"] = measure(lambda: dataset.filter_ids(text="função cálc"), repeat)
+
+    results["import_csv"] = measure(lambda: sum(len(b) for b, _ in iter_csv_batches(csv_path)), repeat)
+    export_path = os.path.join(workdir, "export.csv")
+    results["export_csv"] = measure(lambda: write_csv(store, export_path), repeat)
+    gzip_path = os.path.join(workdir, "export.csv.gz")
+    results["export_csv_gzip"] = measure(lambda: export_file(store, gzip_path), repeat)
+    npz_path = os.path.join(workdir, "export.npz")
+    results["export_npz"] = measure(lambda: export_file(store, npz_path), repeat)
+    results["import_npz"] = measure(lambda: sum(len(b) for b, _ in iter_batches(npz_path)), repeat)
+
+    figures = render_topic_charts(index)
+    results["render_topic_charts"] = dict(measure(lambda: render_topic_charts(index), 1), figures=figures)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do analisador ENEM")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="tamanhos dos conjuntos sintéticos (ex.: 1000 10000 1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por medida")
+    parser.add_argument("--output", help="grava o JSON neste arquivo em vez de imprimir")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="enem_bench_")
+    try:
+        report = {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": {},
+        }
+        for size in args.sizes:
+            print(f"Medindo {size} questões...", file=sys.stderr)
+            report["results"][str(size)] = bench_size(size, workdir, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import generate_questions, write_dataset
+
+# Mede a abertura do analisador em processos novos (import "frio") e compara
+# com um orçamento; sai com código 1 se algum limite for ultrapassado:
+#   python -m benchmarks.startup --size 10000 --import-budget 0.5 --window-budget 1.5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Módulos que não podem ser carregados só para abrir a janela
+DEFERRED = ("matplotlib", "chardet")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import graph
+print(json.dumps({"seconds": time.perf_counter() - start,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+WINDOW_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import customtkinter as ctk
+from graph import ENEMAnalyzer
+try:
+    root = ctk.CTk()
+except Exception as e:
+    print(json.dumps({"skipped": str(e)}))
+    sys.exit(0)
+app = ENEMAnalyzer(root)
+root.update()
+first_window = time.perf_counter() - start
+while not app.loaded:
+    root.update()
+    time.sleep(0.005)
+data_ready = time.perf_counter() - start
+root.destroy()
+print(json.dumps({"first_window": first_window, "data_ready": data_ready,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def run_script(script, cwd):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    # Medição desligada: o benchmark mede o caminho normal
+    env.pop("AUTODIAG_PROFILE", None)
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(size, repeat, workdir):
+    write_dataset(generate_questions(size, seed=size), os.path.join(workdir, "enem_data.json"))
+
+    imports = [run_script(IMPORT_SCRIPT % (DEFERRED,), workdir) for _ in range(repeat)]
+    results = {
+        "import_graph": min(r["seconds"] for r in imports),
+        "deferred_loaded_on_import": imports[0]["loaded"],
+    }
+
+    windows = []
+    for _ in range(repeat):
+        window = run_script(WINDOW_SCRIPT % (DEFERRED,), workdir)
+        if "skipped" in window:
+            results["window"] = {"skipped": window["skipped"]}
+            return results
+        windows.append(window)
+    results["window"] = {
+        "first_window": min(w["first_window"] for w in windows),
+        "data_ready": min(w["data_ready"] for w in windows),
+        "deferred_loaded": windows[0]["loaded"],
+    }
+    return results
+
+
+def check_budget(results, import_budget, window_budget):
+    failures = []
+    if results["import_graph"] > import_budget:
+        failures.append(f"import de graph: {results['import_graph']:.3f}s > {import_budget}s")
+    if results["deferred_loaded_on_import"]:
+        failures.append(f"módulos carregados cedo: {', '.join(results['deferred_loaded_on_import'])}")
+    window = results["window"]
+    if "first_window" in window:
+        if window["first_window"] > window_budget:
+            failures.append(f"primeira janela: {window['first_window']:.3f}s > {window_budget}s")
+        if window["deferred_loaded"]:
+            failures.append(f"módulos carregados na abertura: {', '.join(window['deferred_loaded'])}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de abertura do analisador ENEM")
+    parser.add_argument("--size", type=int, default=10000, help="questões no arquivo de dados")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por medida")
+    parser.add_argument("--import-budget", type=float, default=0.5, help="limite do import de graph (s)")
+    parser.add_argument("--window-budget", type=float, default=1.5, help="limite até a primeira janela (s)")
+    parser.add_argument("--output", help="grava o JSON neste arquivo em vez de imprimir")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="enem_startup_")
+    try:
+        results = bench_startup(args.size, args.repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    failures = check_budget(results, args.import_budget, args.window_budget)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "size": args.size,
+        "budget": {"import": args.import_budget, "window": args.window_budget},
+        "results": results,
+        "failures": failures,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"Fora do orçamento: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
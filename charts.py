@@ -0,0 +1,196 @@
+import tkinter as tk
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+import customtkinter as ctk
+
+from chartstyle import draw_bars, figure_height, ordered_counts
+from profiling import timed, instrument_method
+
+# Separa o tempo do Matplotlib (layout e desenho) do resto nas medições
+instrument_method(Figure, "tight_layout", "matplotlib_tight_layout")
+instrument_method(FigureCanvasTkAgg, "draw", "matplotlib_draw")
+
+
+class SubjectChartManager:
+    # Mantém uma figura persistente por matéria. A cada atualização compara as
+    # contagens novas com as desenhadas e só mexe nas matérias que mudaram.
+    # Gráficos fora da tela ficam marcados como pendentes e só são desenhados
+    # quando a aba é aberta ou o frame entra na área visível da rolagem.
+
+    def __init__(self, parent, title, scroll_frame=None, bar_width=0.6, label_rotation=20,
+                 label_fontsize=9, label_ha='center', empty_text=None):
+        self.parent = parent
+        self.scroll_frame = scroll_frame
+        self.title = title
+        self.bar_width = bar_width
+        self.label_rotation = label_rotation
+        self.label_fontsize = label_fontsize
+        self.label_ha = label_ha
+        self.empty_text = empty_text
+        self.empty_label = None
+        self.charts = {}
+        self.render_scheduled = False
+        if scroll_frame is not None:
+            self.watch_scroll(scroll_frame)
+
+    def watch_scroll(self, scroll_frame):
+        # O canvas interno do CTkScrollableFrame avisa a barra de rolagem a cada
+        # movimento; aproveitamos o mesmo aviso para desenhar o que apareceu
+        canvas = scroll_frame._parent_canvas
+        scrollbar = scroll_frame._scrollbar
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.schedule_render()
+
+        canvas.configure(yscrollcommand=on_scroll)
+
+    def update(self, data, subjects=None):
+        # data: matéria -> {nome: contagem}
+        # subjects: matérias que podem ter mudado (None = conferir todas)
+        if subjects is None:
+            subjects = set(self.charts) | set(data)
+        # Mantém a ordem dos dados para os frames novos
+        ordered = [s for s in data if s in subjects] + [s for s in subjects if s not in data]
+
+        changed = []
+        for subject in ordered:
+            if subject not in data:
+                if subject in self.charts:
+                    self.charts.pop(subject).destroy()
+                    changed.append(subject)
+                continue
+            counts = data[subject]
+            chart = self.charts.get(subject)
+            if chart is None:
+                chart = self.charts[subject] = SubjectChart(self, subject)
+            if chart.set_counts(counts):
+                changed.append(subject)
+
+        self.update_empty_label()
+        if changed:
+            self.schedule_render()
+        return changed
+
+    def schedule_render(self):
+        if not self.render_scheduled:
+            self.render_scheduled = True
+            self.parent.after_idle(self.render_visible)
+
+    @timed("chart_render_visible", figures=lambda manager: len(manager.charts))
+    def render_visible(self):
+        self.render_scheduled = False
+        dirty = [chart for chart in self.charts.values() if chart.pending is not None]
+        if not dirty or not self.parent.winfo_viewable():
+            return
+
+        # Garante que a geometria dos frames recém-criados já foi calculada
+        self.parent.update_idletasks()
+        view = self.scroll_frame._parent_canvas if self.scroll_frame is not None else self.parent
+        view_top = view.winfo_rooty()
+        view_bottom = view_top + view.winfo_height()
+
+        for chart in dirty:
+            top = chart.frame.winfo_rooty()
+            bottom = top + chart.frame.winfo_height()
+            if bottom >= view_top and top <= view_bottom:
+                chart.render()
+
+    def update_empty_label(self):
+        if self.empty_text is None:
+            return
+        if self.charts and self.empty_label is not None:
+            self.empty_label.destroy()
+            self.empty_label = None
+        elif not self.charts and self.empty_label is None:
+            # Se não houver dados, exibe uma mensagem
+            self.empty_label = ctk.CTkLabel(self.parent, text=self.empty_text)
+            self.empty_label.pack(expand=True, pady=45)
+
+
+class SubjectChart:
+    DPI = 100
+
+    def __init__(self, manager, subject):
+        self.manager = manager
+        self.counts = None
+        self.pending = None
+        self.names = None
+        self.bars = []
+        self.texts = []
+        self.fig = None
+        self.ax = None
+        self.canvas = None
+
+        # Frame separado para cada matéria
+        self.frame = ctk.CTkFrame(manager.parent)
+        self.frame.pack(fill=tk.X, expand=True, padx=10, pady=5, anchor="n")
+        ctk.CTkLabel(self.frame, text=manager.title.format(subject), font=("Arial", 14, "bold")).pack(pady=(5, 10))
+
+        # Reserva o espaço do gráfico até ele ser desenhado de fato
+        self.placeholder = ctk.CTkFrame(self.frame, height=4 * self.DPI, fg_color="transparent")
+        self.placeholder.pack(fill=tk.X, padx=5, pady=5)
+
+    def set_counts(self, counts):
+        counts = dict(counts)
+        current = self.pending if self.pending is not None else self.counts
+        if counts == current:
+            return False
+        self.pending = None if counts == self.counts else counts
+        if self.placeholder is not None:
+            self.placeholder.configure(height=int(figure_height(len(counts)) * self.DPI))
+        return True
+
+    def build(self):
+        self.placeholder.destroy()
+        self.placeholder = None
+        self.fig = Figure(figsize=(7, 4), dpi=self.DPI)
+        self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def render(self):
+        if self.pending is None:
+            return False
+        if self.canvas is None:
+            self.build()
+        counts = self.pending
+        self.pending = None
+
+        names, values = ordered_counts(counts)
+
+        if names == self.names:
+            # Mesmas barras na mesma ordem: só altera as alturas
+            for bar, text, value in zip(self.bars, self.texts, values):
+                bar.set_height(value)
+                text.set_y(value)
+                text.set_text(f'{value}')
+            self.ax.set_ylim(0, max(values) * 1.2)
+        else:
+            self.rebuild(names, values)
+
+        self.counts = counts
+        self.names = names
+        self.canvas.draw_idle()
+        return True
+
+    def rebuild(self, names, values):
+        manager = self.manager
+        ax = self.ax
+        ax.clear()
+
+        # Altura da figura acompanha o número de barras
+        height = figure_height(len(names))
+        if self.fig.get_figheight() != height:
+            self.fig.set_size_inches(7, height)
+            self.canvas.get_tk_widget().configure(height=int(height * self.fig.dpi))
+
+        self.bars, self.texts = draw_bars(ax, names, values, manager.bar_width, manager.label_rotation,
+                                          manager.label_fontsize, manager.label_ha)
+
+        # Os rótulos mudaram: recalcula o layout
+        self.fig.tight_layout()
+
+    def destroy(self):
+        self.frame.destroy()
+
@@ -0,0 +1,64 @@
+from matplotlib.ticker import MaxNLocator
+
+# Desenho dos gráficos, sem depender da tela: usado pelas abas da janela
+# (charts.py) e pelos relatórios gerados fora dela (report.py)
+
+BAR_COLOR = '#4a6fa5'
+TOPIC_STYLE = {"bar_width": 0.6, "label_rotation": 20, "label_fontsize": 9, "label_ha": 'center'}
+SUBTOPIC_STYLE = {"bar_width": 0.5, "label_rotation": 45, "label_fontsize": 7, "label_ha": 'right'}
+
+
+def figure_height(bar_count):
+    return max(4, bar_count * 0.4)
+
+
+def ordered_counts(counts):
+    # Ordenar por contagem
+    ordered = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+    return [t[0] for t in ordered], [t[1] for t in ordered]
+
+
+def draw_bars(ax, names, values, bar_width=0.6, label_rotation=20, label_fontsize=9, label_ha='center'):
+    positions = range(len(names))
+    bars = list(ax.bar(positions, values, width=bar_width, color=BAR_COLOR))
+
+    # Configurações do gráfico
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.set_xticks(positions)
+    ax.set_xticklabels(names, ha=label_ha, rotation=label_rotation, fontsize=label_fontsize)
+    ax.tick_params(axis='y', labelsize=9)
+    ax.set_ylim(0, max(values) * 1.2)  # Espaço extra para os valores acima das barras
+    # Só valores inteiros, mas sem um tique por unidade: com centenas de
+    # questões, um rótulo por unidade custava quase um segundo por gráfico
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+
+    # Valores em cima das barras
+    texts = [
+        ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(), f'{int(bar.get_height())}',
+                ha='center', va='bottom', fontsize=9)
+        for bar in bars
+    ]
+    return bars, texts
+
+
+def draw_pie(ax, counts):
+    if counts:
+        ax.pie(counts.values(), labels=counts.keys(), autopct='%1.1f%%', textprops={'fontsize': 8})
+        ax.set_position([0.1, 0.1, 0.8, 0.8])
+
+
+def draw_progress(ax, keys, series, max_labels=12):
+    # Uma linha por medida ({nome: valores}) ao longo dos baldes de tempo;
+    # só alguns rótulos no eixo x, para não se sobreporem
+    positions = range(len(keys))
+    for label, values in series.items():
+        ax.plot(positions, values, marker='o', markersize=3, label=label)
+    step = max(1, -(-len(keys) // max_labels))
+    ax.set_xticks(list(positions)[::step])
+    ax.set_xticklabels(keys[::step], rotation=45, ha='right', fontsize=8)
+    ax.tick_params(axis='y', labelsize=9)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_ylim(bottom=0)
+    if series:
+        ax.legend(fontsize=8)
@@ -0,0 +1,148 @@
+import csv
+import glob
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregates import ERROR_TYPES
+from dataset import SQLITE_SUFFIXES, load_index
+
+# Modo turma/escola: junta os arquivos de vários alunos em um ranking único.
+# Cada processo resume um bloco de arquivos (map) e os resumos parciais são
+# somados no processo principal (reduce).
+
+LEVELS = ("subjects", "topics", "subtopics", "errors")
+
+
+def expand_paths(patterns):
+    # Aceita arquivos, diretórios (todos os .json e bancos SQLite dentro) e
+    # padrões glob
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(data_files(pattern))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def data_files(directory):
+    # Um JSON migrado tem o banco ao lado (mesmo nome, .db): o aluno entra
+    # uma vez só, pelo banco, que é o arquivo atualizado
+    found = []
+    for suffix in ('.json',) + SQLITE_SUFFIXES:
+        found.extend(glob.glob(os.path.join(directory, '**', '*' + suffix), recursive=True))
+    databases = {os.path.splitext(path)[0] for path in found if path.endswith(SQLITE_SUFFIXES)}
+    return sorted(path for path in found
+                  if path.endswith(SQLITE_SUFFIXES) or os.path.splitext(path)[0] not in databases)
+
+
+def empty_partial():
+    return {
+        "students": 0,
+        "failed": [],
+        "questions": Counter(),
+        "students_with": Counter(),
+    }
+
+
+def summarize_chunk(paths):
+    # Chaves: ("subjects", matéria), ("topics", matéria, tópico),
+    # ("subtopics", matéria, subtópico), ("errors", tipo)
+    partial = empty_partial()
+    for path in paths:
+        # Um arquivo que não existe seria lido como vazio e contaria como aluno
+        if not os.path.exists(path):
+            partial["failed"].append(f"{path}: arquivo não encontrado")
+            continue
+        try:
+            summary = load_index(path).as_dict()
+        except Exception as e:
+            partial["failed"].append(f"{path}: {e}")
+            continue
+
+        counts = Counter()
+        for subject, count in summary["subjects"].items():
+            counts[("subjects", subject)] = count
+            for topic, n in summary["topics"][subject].items():
+                counts[("topics", subject, topic)] = n
+            for subtopic, n in summary["subtopics"][subject].items():
+                counts[("subtopics", subject, subtopic)] = n
+        for tipo in ERROR_TYPES:
+            if summary["errors"][tipo]:
+                counts[("errors", tipo)] = summary["errors"][tipo]
+
+        partial["students"] += 1
+        partial["questions"].update(counts)
+        partial["students_with"].update(counts.keys())
+    return partial
+
+
+def merge_partials(partials):
+    merged = empty_partial()
+    for partial in partials:
+        merged["students"] += partial["students"]
+        merged["failed"].extend(partial["failed"])
+        merged["questions"].update(partial["questions"])
+        merged["students_with"].update(partial["students_with"])
+    return merged
+
+
+def chunked(paths, chunk_count):
+    size = max(1, -(-len(paths) // chunk_count))
+    return [paths[i:i + size] for i in range(0, len(paths), size)]
+
+
+def aggregate_cohort(paths, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        return summarize_chunk(paths)
+    # Alguns blocos por processo equilibram arquivos de tamanhos diferentes
+    chunks = chunked(paths, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_partials(pool.map(summarize_chunk, chunks))
+
+
+def rankings(merged, top=None):
+    # Ranking por nível, do mais frequente para o menos frequente
+    by_level = defaultdict(list)
+    for key, count in merged["questions"].items():
+        level = key[0]
+        by_level[level].append({
+            "subject": key[1] if level != "errors" else None,
+            "name": key[-1],
+            "questions": count,
+            "students": merged["students_with"][key],
+        })
+    result = {}
+    for level in LEVELS:
+        rows = sorted(by_level[level], key=lambda r: (r["questions"], r["students"]), reverse=True)
+        result[level] = rows[:top] if top else rows
+    return result
+
+
+def format_rankings(merged, ranked):
+    titles = {"subjects": "Matérias", "topics": "Tópicos", "subtopics": "Subtópicos", "errors": "Tipos de erro"}
+    total = sum(count for key, count in merged["questions"].items() if key[0] == "subjects")
+    lines = [f"== Turma: {merged['students']} alunos, {total} questões =="]
+    for level in LEVELS:
+        lines.append(f"\n-- {titles[level]} --")
+        for position, row in enumerate(ranked[level], 1):
+            name = row["name"] if row["subject"] is None or level == "subjects" else f"{row['subject']} / {row['name']}"
+            lines.append(f"{position:>3}. {name}: {row['questions']} questões, {row['students']} alunos")
+    if merged["failed"]:
+        lines.append(f"\n{len(merged['failed'])} arquivos ignorados:")
+        lines.extend(f"  {failure}" for failure in merged["failed"])
+    return "\n".join(lines)
+
+
+def write_rankings_csv(ranked, filepath):
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Nível', 'Matéria', 'Nome', 'Questões', 'Alunos'])
+        for level in LEVELS:
+            for row in ranked[level]:
+                writer.writerow([level, row["subject"] or '', row["name"], row["questions"], row["students"]])
+
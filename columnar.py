@@ -0,0 +1,199 @@
+from collections import Counter
+
+import numpy as np
+
+from aggregates import ERROR_TYPES, NO_SUBTOPIC, AggregateIndex
+from profiling import timed
+
+# Bit de cada tipo de erro na máscara de 3 bits (conteudo=1, atencao=2, tempo=4)
+ERROR_BITS = {tipo: 1 << i for i, tipo in enumerate(ERROR_TYPES)}
+
+
+class Vocabulary:
+    # Codificação por dicionário: cada texto distinto vira um inteiro
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value):
+        return self.codes.get(value, -1)
+
+
+class ColumnarStore:
+    # Cópia analítica das questões em colunas NumPy: matéria, tópico e
+    # subtópico como códigos inteiros e os erros numa máscara de 3 bits.
+    # Contagens e filtros viram np.bincount/np.unique e máscaras booleanas.
+    # Exclusões só desligam a linha em "alive"; as colunas são compactadas
+    # quando metade das linhas está morta.
+
+    def __init__(self, capacity=1024):
+        self.subjects = Vocabulary()
+        self.topics = Vocabulary()
+        self.subtopics = Vocabulary()
+        self.size = 0
+        self.deleted = 0
+        self.ids = []
+        self.rows = {}
+        self.subject = np.zeros(capacity, dtype=np.int16)
+        self.topic = np.zeros(capacity, dtype=np.int32)
+        self.subtopic = np.zeros(capacity, dtype=np.int32)
+        self.errors = np.zeros(capacity, dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    @classmethod
+    def from_questions(cls, questions):
+        store = cls()
+        store.extend(questions)
+        return store
+
+    def __len__(self):
+        return self.size - self.deleted
+
+    # ---------- escrita ----------
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        capacity = len(self.subject)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("subject", "topic", "subtopic", "errors", "alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def extend(self, questions):
+        questions = list(questions)
+        self._reserve(len(questions))
+        start = self.size
+        subjects, topics, subtopics, errors = [], [], [], []
+        for row, q in enumerate(questions, start):
+            subjects.append(self.subjects.encode(q["subject"]))
+            topics.append(self.topics.encode(q["topic"]))
+            subtopics.append(self.subtopics.encode(q["subtopic"] or NO_SUBTOPIC))
+            errors.append(error_mask(q.get("erros")))
+            self.ids.append(q.get("id"))
+            self.rows[q.get("id")] = row
+
+        end = start + len(questions)
+        self.subject[start:end] = subjects
+        self.topic[start:end] = topics
+        self.subtopic[start:end] = subtopics
+        self.errors[start:end] = errors
+        self.alive[start:end] = True
+        self.size = end
+
+    def delete(self, question_id):
+        row = self.rows.pop(question_id, None)
+        if row is None:
+            return
+        self.alive[row] = False
+        self.deleted += 1
+        if self.deleted > 1024 and self.deleted * 2 > self.size:
+            self.compact()
+
+    def compact(self):
+        keep = self.alive[:self.size]
+        for name in ("subject", "topic", "subtopic", "errors"):
+            column = getattr(self, name)[:self.size][keep]
+            new = np.zeros(max(1024, len(column) * 2), dtype=column.dtype)
+            new[:len(column)] = column
+            setattr(self, name, new)
+        self.ids = [i for i, alive in zip(self.ids, keep.tolist()) if alive]
+        self.rows = {question_id: row for row, question_id in enumerate(self.ids)}
+        self.size = len(self.ids)
+        self.deleted = 0
+        self.alive = np.zeros(len(self.subject), dtype=bool)
+        self.alive[:self.size] = True
+
+    # ---------- consultas ----------
+
+    def select(self, subject=None, topic=None, subtopic=None, errors=(), ids=None):
+        # Máscara booleana das linhas vivas que passam em todos os filtros
+        mask = self.alive[:self.size].copy()
+        if subject is not None:
+            mask &= self.subject[:self.size] == self.subjects.code(subject)
+        if topic is not None:
+            mask &= self.topic[:self.size] == self.topics.code(topic)
+        if subtopic is not None:
+            mask &= self.subtopic[:self.size] == self.subtopics.code(subtopic or NO_SUBTOPIC)
+        for tipo in errors:
+            mask &= (self.errors[:self.size] & ERROR_BITS[tipo]) != 0
+        if ids is not None:
+            rows = [self.rows[i] for i in ids if i in self.rows]
+            only = np.zeros(self.size, dtype=bool)
+            only[rows] = True
+            mask &= only
+        return mask
+
+    def _mask(self, mask):
+        return self.alive[:self.size] if mask is None else mask
+
+    def subject_counts(self, mask=None):
+        mask = self._mask(mask)
+        counts = np.bincount(self.subject[:self.size][mask], minlength=len(self.subjects))
+        return {self.subjects.values[code]: int(n) for code, n in enumerate(counts) if n}
+
+    def error_counts(self, mask=None):
+        errors = self.errors[:self.size][self._mask(mask)]
+        return {tipo: int(np.count_nonzero(errors & bit)) for tipo, bit in ERROR_BITS.items()}
+
+    def error_crosstab(self, mask=None):
+        # Matriz matéria x tipo de erro
+        mask = self._mask(mask)
+        subject = self.subject[:self.size]
+        errors = self.errors[:self.size]
+        table = np.zeros((len(self.subjects), len(ERROR_TYPES)), dtype=np.int64)
+        for column, bit in enumerate(ERROR_BITS.values()):
+            hit = mask & ((errors & bit) != 0)
+            table[:, column] = np.bincount(subject[hit], minlength=len(self.subjects))
+        return table
+
+    def pair_counts(self, column, vocabulary, mask=None):
+        # Contagem por (matéria, valor) com um único np.unique
+        mask = self._mask(mask)
+        width = max(1, len(vocabulary))
+        combined = self.subject[:self.size][mask].astype(np.int64) * width + column[:self.size][mask]
+        keys, counts = np.unique(combined, return_counts=True)
+        result = {}
+        for key, n in zip(keys.tolist(), counts.tolist()):
+            subject = self.subjects.values[key // width]
+            result.setdefault(subject, Counter())[vocabulary.values[key % width]] = n
+        return result
+
+    @timed("aggregate")
+    def to_index(self, mask=None):
+        # Monta um AggregateIndex inteiro com operações vetorizadas
+        index = AggregateIndex()
+        index.subjects.update(self.subject_counts(mask))
+        index.topics.update(self.pair_counts(self.topic, self.topics, mask))
+        index.subtopics.update(self.pair_counts(self.subtopic, self.subtopics, mask))
+        index.errors.update({tipo: n for tipo, n in self.error_counts(mask).items() if n})
+        table = self.error_crosstab(mask)
+        for code, row in enumerate(table.tolist()):
+            counts = {tipo: n for tipo, n in zip(ERROR_TYPES, row) if n}
+            if counts:
+                index.subject_errors[self.subjects.values[code]].update(counts)
+        return index
+
+
+def error_mask(erros):
+    erros = erros or {}
+    mask = 0
+    for tipo, bit in ERROR_BITS.items():
+        if erros.get(tipo):
+            mask |= bit
+    return mask
@@ -0,0 +1,127 @@
+import os
+import re
+import uuid
+from datetime import datetime
+
+# Formato gravado por now_iso: "AAAA-MM-DDTHH:MM:SS+HH:MM"
+CANONICAL_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}")
+
+
+def new_id():
+    return uuid.uuid4().hex
+
+
+def now_iso():
+    # Data de cadastro ("created_at"): ISO 8601 no fuso local, com o deslocamento
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def file_timestamp(path):
+    # Data de modificação do arquivo, no mesmo formato: é a melhor estimativa
+    # da data de cadastro das questões antigas, que não tinham uma
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return now_iso()
+    return datetime.fromtimestamp(mtime).astimezone().isoformat(timespec="seconds")
+
+
+def parse_timestamp(value):
+    # Valida uma data ISO 8601 vinda de um arquivo importado; None se inválida
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.isoformat(timespec="seconds")
+
+
+def normalize_timestamp(value):
+    # Como parse_timestamp, com um atalho para o formato já gravado pelo app
+    if isinstance(value, str) and CANONICAL_TIMESTAMP.fullmatch(value):
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return value
+    return parse_timestamp(value)
+
+
+def fill_created_at(questions, default):
+    # Migração: questões sem data, ou com uma data que não é ISO 8601 (editada
+    # à mão, vinda de outro programa), recebem "default"; as outras ficam no
+    # formato do app. Devolve quantas mudaram.
+    changed = 0
+    for q in questions:
+        value = q.get("created_at")
+        normalized = normalize_timestamp(value) or default
+        if normalized != value:
+            q["created_at"] = normalized
+            changed += 1
+    return changed
+
+
+def format_row(q):
+    # Valores de uma linha da Planilha
+    erros = q.get("erros", {})
+    erro_str = ", ".join([
+        tipo.capitalize()
+        for tipo, marcado in erros.items()
+        if marcado
+    ]) if erros else ""
+
+    return (
+        q["subject"],
+        q["topic"],
+        q["subtopic"],
+        q["description"][:120] + "..." if len(q["description"]) >120 else q["description"],
+        erro_str
+    )
+
+
+class QuestionStore:
+    # Questões em ordem de cadastro, indexadas pelo id. Buscar ou excluir pelo
+    # id é O(1); a lista de ids por posição (usada pela Planilha) é refeita
+    # só quando alguém pede uma posição depois de uma exclusão.
+
+    def __init__(self, questions=()):
+        self.by_id = {}
+        self._order = []
+        for q in questions:
+            self.add(q)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __contains__(self, question_id):
+        return question_id in self.by_id
+
+    def get(self, question_id):
+        return self.by_id.get(question_id)
+
+    def add(self, question):
+        if not question.get("id"):
+            question["id"] = new_id()
+        self.by_id[question["id"]] = question
+        if self._order is not None:
+            self._order.append(question["id"])
+        return question
+
+    def remove(self, question_id):
+        question = self.by_id.pop(question_id)
+        self._order = None
+        return question
+
+    def ids(self):
+        if self._order is None:
+            self._order = list(self.by_id)
+        return self._order
+
+    def at(self, position):
+        return self.by_id[self.ids()[position]]
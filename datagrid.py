@@ -0,0 +1,154 @@
+import tkinter as tk
+from tkinter import ttk
+
+from profiling import timed
+
+
+class VirtualTreeview:
+    # Treeview "virtual": só as linhas visíveis (mais uma margem) existem como
+    # itens do Tk. As demais são buscadas em get_row(índice) conforme a rolagem.
+
+    def __init__(self, parent, columns, row_count, get_row, buffer=50):
+        self.row_count = row_count
+        self.get_row = get_row
+        self.buffer = buffer
+        self.start = 0      # índice da primeira linha presente na Treeview
+        self.size = 0       # quantas linhas estão na Treeview
+        self.top = 0        # índice da primeira linha visível
+        self.page = 20      # quantas linhas cabem na tela
+
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings")
+        for column in columns:
+            self.tree.heading(column, text=column)
+
+        # A barra de rolagem representa todas as linhas, não só as da Treeview
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.on_scrollbar)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.page))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.page))
+        self.tree.bind("<Up>", lambda e: self.on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self.on_arrow(1))
+
+    def pack(self):
+        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    # ---------- rolagem ----------
+
+    def on_resize(self, event):
+        rowheight = ttk.Style().lookup("Treeview", "rowheight") or 20
+        page = max(1, int(event.height) // int(rowheight) - 1)
+        if page != self.page:
+            self.page = page
+            self.scroll_to(self.top)
+
+    def on_wheel(self, event):
+        # Windows manda múltiplos de 120; macOS manda passos pequenos
+        if abs(event.delta) >= 120:
+            step = -3 * (event.delta // 120)
+        else:
+            step = -1 if event.delta > 0 else 1
+        return self.scroll(step)
+
+    def on_arrow(self, step):
+        # Move a seleção pelas linhas virtuais, rolando quando chega à borda
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        index = self.start + self.tree.index(selection[-1]) + step
+        if not 0 <= index < self.row_count():
+            return "break"
+        if index < self.top or index >= self.top + self.page:
+            self.scroll(step)
+        position = index - self.start
+        children = self.tree.get_children()
+        if 0 <= position < len(children):
+            self.tree.selection_set(children[position])
+            self.tree.focus(children[position])
+        return "break"
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.row_count()))
+        elif action == "scroll":
+            step = int(value) * (self.page if unit == "pages" else 1)
+            self.scroll(step)
+
+    def scroll(self, step):
+        self.scroll_to(self.top + step)
+        return "break"
+
+    def scroll_to(self, top):
+        total = self.row_count()
+        self.top = max(0, min(top, total - self.page))
+
+        # Só recarrega a janela quando a área visível sai da margem
+        window_end = self.start + self.size
+        if self.top < self.start or (self.top + self.page > window_end and window_end < total):
+            self.fill()
+        self.sync_view()
+
+    def sync_view(self):
+        total = self.row_count()
+        if self.size:
+            self.tree.yview_moveto((self.top - self.start) / self.size)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.page) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    # ---------- conteúdo ----------
+
+    @timed("treeview_fill", records=lambda grid: grid.size)
+    def fill(self):
+        total = self.row_count()
+        self.start = max(0, self.top - self.buffer)
+        end = min(total, self.top + self.page + self.buffer)
+
+        selection = self.tree.selection()
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        for index in range(self.start, end):
+            iid, values = self.get_row(index)
+            self.tree.insert("", tk.END, iid=iid, values=values)
+        self.size = end - self.start
+
+        # Mantém selecionadas as linhas que continuam na janela
+        kept = [iid for iid in selection if self.tree.exists(iid)]
+        if kept:
+            self.tree.selection_set(kept)
+
+    def refresh(self):
+        # Recarrega só a janela atual (ex.: depois de uma importação)
+        total = self.row_count()
+        self.top = max(0, min(self.top, total - self.page))
+        self.fill()
+        self.sync_view()
+
+    def row_inserted(self, index):
+        # Linha nova na posição "index" das linhas virtuais
+        if index < self.start:
+            self.start += 1
+            self.top += 1
+        elif index <= self.start + self.size and index < self.top + self.page + self.buffer:
+            iid, values = self.get_row(index)
+            self.tree.insert("", index - self.start, iid=iid, values=values)
+            self.size += 1
+        self.sync_view()
+
+    def row_deleted(self, index, item=None):
+        # "item" é o item da Treeview, quando a linha estava na janela
+        if index < self.start:
+            self.start -= 1
+            self.top = max(0, self.top - 1)
+        elif index < self.start + self.size:
+            if item is None:
+                item = self.tree.get_children()[index - self.start]
+            self.tree.delete(item)
+            self.size -= 1
+        self.scroll_to(self.top)
@@ -0,0 +1,223 @@
+import os
+import sys
+
+from aggregates import AggregateIndex
+from columnar import ColumnarStore
+from core import QuestionStore, normalize_timestamp, now_iso
+from progress import ProgressIndex
+from recommender import WeaknessRanking
+from search import SearchIndex, tokenize
+from storage import JournalStorage
+
+try:
+    import sqlite3
+    from sqlite_storage import SQLITE_SUFFIXES, SqliteStorage, is_sqlite_path, migrate_json
+except ImportError:
+    # Python compilado sem sqlite3: só o armazenamento em JSON
+    sqlite3 = None
+    SQLITE_SUFFIXES = ()
+
+DEFAULT_PATH = 'enem_data.json'
+STORAGE_ENV = "AUTODIAG_STORAGE"
+
+
+class Dataset:
+    # Questões de um aluno: armazenamento em disco, índice por id e contagens.
+    # Não depende de interface gráfica; é usado pela janela e pela linha de comando.
+
+    def __init__(self, path=DEFAULT_PATH, read_only=False, async_writes=False):
+        self.path = path
+        self.storage = open_storage(path, read_only=read_only, async_writes=async_writes)
+        self.questions = QuestionStore()
+        self.columns = ColumnarStore()
+        self.index = AggregateIndex()
+        self._search = None
+        self._ranking = None
+        self._progress = None
+
+    def load(self):
+        self.questions = QuestionStore(self.storage.load())
+        # As contagens iniciais saem das colunas (bincount) em vez de um laço por questão
+        self.columns = ColumnarStore.from_questions(self.questions)
+        self.index = self.columns.to_index()
+        self._search = None
+        self._ranking = None
+        self._progress = None
+        return self
+
+    @property
+    def search(self):
+        # O índice de busca só é montado no primeiro filtro
+        if self._search is None:
+            self._search = SearchIndex(self.questions)
+        return self._search
+
+    @property
+    def ranking(self):
+        # Montado na primeira consulta; depois acompanha cada alteração
+        if self._ranking is None:
+            self._ranking = WeaknessRanking(self.questions)
+        return self._ranking
+
+    @property
+    def progress(self):
+        # Também montado na primeira consulta (aba Progresso)
+        if self._progress is None:
+            self._progress = ProgressIndex(self.questions)
+        return self._progress
+
+    def weakest(self, k=10):
+        # O que estudar primeiro: os k (matéria, tópico, subtópico) com mais erros ponderados
+        return self.ranking.top(k)
+
+    def add(self, question):
+        self.add_many([question])
+        return question
+
+    def add_many(self, questions):
+        # Questões novas (cadastro ou importação sem coluna de data) recebem
+        # a data de agora; uma data inválida também
+        created_at = now_iso()
+        for question in questions:
+            question["created_at"] = normalize_timestamp(question.get("created_at")) or created_at
+            self.questions.add(question)
+            self.index.add(question)
+            if self._search is not None:
+                self._search.add(question)
+            if self._ranking is not None:
+                self._ranking.add(question)
+            if self._progress is not None:
+                self._progress.add(question)
+        self.columns.extend(questions)
+        self.storage.add_many(questions)
+
+    def delete_many(self, question_ids):
+        question_ids = [i for i in question_ids if i in self.questions]
+        for question_id in question_ids:
+            question = self.questions.remove(question_id)
+            self.index.remove(question)
+            if self._search is not None:
+                self._search.remove(question)
+            if self._ranking is not None:
+                self._ranking.remove(question)
+            if self._progress is not None:
+                self._progress.remove(question)
+            self.columns.delete(question_id)
+        self.storage.delete_many(question_ids)
+        return question_ids
+
+    def filter_ids(self, text="", subject=None, topic=None, subtopic=None, errors=()):
+        # Ids que passam no filtro, na ordem de cadastro; None = sem filtro.
+        # Sem filtro não há o que consultar: o índice de busca só é montado
+        # quando alguém filtra de verdade
+        if not (subject or topic or subtopic or errors or tokenize(text)):
+            return None
+        ids = self.search.search(text, subject, topic, subtopic, errors)
+        if ids is None:
+            return None
+        return sorted(ids, key=self.columns.rows.__getitem__)
+
+    def filtered_index(self, ids):
+        # Contagens só das questões filtradas, calculadas nas colunas
+        return self.columns.to_index(self.columns.select(ids=ids))
+
+    def maybe_compact(self):
+        # As alterações vão para o journal; de vez em quando vira snapshot
+        if self.storage.needs_compaction():
+            self.storage.compact(self.questions)
+
+    def save(self):
+        # Snapshot completo e síncrono (ao fechar)
+        self.storage.compact(self.questions, background=False)
+        self.storage.close()
+
+
+def open_storage(path, read_only=False, async_writes=False):
+    # O formato segue a extensão: .db/.sqlite no SQLite, o resto em JSON
+    if sqlite3 is not None and is_sqlite_path(path):
+        return SqliteStorage(path, read_only=read_only, async_writes=async_writes)
+    return JournalStorage(path, read_only=read_only, async_writes=async_writes)
+
+
+def resolve_data_path(json_path=DEFAULT_PATH):
+    # Arquivo de dados da janela: o banco SQLite ao lado do JSON, migrado na
+    # primeira abertura. AUTODIAG_STORAGE=json, Python sem sqlite3 ou uma
+    # migração que falha mantêm o JSON.
+    # Depois da migração o JSON é só uma cópia antiga: se o banco existe mas
+    # não abre (ou AUTODIAG_STORAGE=json), levanta RuntimeError em vez de
+    # voltar para o JSON, onde as questões novas sumiriam na próxima abertura.
+    db_path = sibling_db_path(json_path)
+    if sqlite3 is not None and os.path.exists(db_path):
+        if not sqlite_enabled():
+            raise RuntimeError(f"{json_path} já foi migrado para {db_path}; com {STORAGE_ENV}=json "
+                               f"as alterações iriam para a cópia antiga")
+        try:
+            # Confere que o banco abre antes de usá-lo
+            storage = SqliteStorage(db_path, read_only=True)
+            try:
+                storage.count()
+            finally:
+                storage.close()
+        except (sqlite3.Error, OSError) as e:
+            raise RuntimeError(f"Não foi possível abrir {db_path}: {e}") from e
+        return db_path
+    if not sqlite_enabled():
+        return json_path
+    if os.path.exists(json_path):
+        try:
+            count = migrate_json(json_path, db_path)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"SQLite indisponível ({e}); usando {json_path}", file=sys.stderr)
+            return json_path
+        print(f"{count} questões migradas de {json_path} para {db_path}", file=sys.stderr)
+    return db_path
+
+
+def sqlite_enabled():
+    return sqlite3 is not None and os.environ.get(STORAGE_ENV, "sqlite").strip().lower() != "json"
+
+
+def sibling_db_path(json_path):
+    return os.path.splitext(json_path)[0] + ".db"
+
+
+def migrated_path(path):
+    # Um JSON que já foi migrado: a janela usa o banco ao lado e não lê mais
+    # o JSON. Devolve o caminho do banco, ou None.
+    if sqlite3 is None or is_sqlite_path(path):
+        return None
+    db_path = sibling_db_path(path)
+    return db_path if os.path.exists(db_path) else None
+
+
+def load_dataset(path, read_only=True):
+    return Dataset(path, read_only=read_only).load()
+
+
+def iter_questions(path):
+    # Questões em ordem de cadastro; no SQLite vêm em páginas (keyset)
+    if sqlite3 is not None and is_sqlite_path(path):
+        storage = SqliteStorage(path, read_only=True)
+        try:
+            yield from storage.iter_questions()
+        finally:
+            storage.close()
+    else:
+        yield from load_dataset(path).questions
+
+
+def recommend(path, k=10, weights=None, half_life_days=None):
+    # Ranking de um arquivo; com half_life_days, erros antigos pesam menos
+    questions = load_dataset(path).questions
+    return WeaknessRanking(questions, weights=weights, half_life_days=half_life_days).top(k)
+
+
+def load_index(path):
+    # Só as contagens: no SQLite saem de GROUP BY, sem carregar as questões
+    if sqlite3 is not None and is_sqlite_path(path):
+        storage = SqliteStorage(path, read_only=True)
+        try:
+            return storage.aggregate_index()
+        finally:
+            storage.close()
+    return load_dataset(path).index
@@ -0,0 +1,102 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import customtkinter as ctk
+
+from profiling import profiler
+
+COLUMNS = ("Função", "Chamadas", "Média (ms)", "p95 (ms)", "Máx (ms)", "Registros", "Figuras", "Histograma (ms)")
+REFRESH_MS = 1000
+
+
+class ProfilePanel:
+    # Janela de depuração (F12): liga/desliga a medição, mostra os tempos
+    # das últimas chamadas e exporta JSON ou pstats para análise fora do app
+
+    def __init__(self, root):
+        self.window = ctk.CTkToplevel(root)
+        self.window.title("Desempenho")
+        self.window.geometry("900x360")
+        self.refresh_job = None
+
+        top = ctk.CTkFrame(self.window)
+        top.pack(fill=tk.X, padx=5, pady=5)
+        self.var_enabled = tk.BooleanVar(value=profiler.enabled)
+        ctk.CTkCheckBox(top, text="Medir tempos", variable=self.var_enabled,
+                        command=self.toggle).pack(side="left", padx=5)
+        self.var_cprofile = tk.BooleanVar(value=profiler.cprofile_running)
+        ctk.CTkCheckBox(top, text="cProfile", variable=self.var_cprofile,
+                        command=self.toggle_cprofile).pack(side="left", padx=5)
+        ctk.CTkButton(top, text="Limpar", width=80, command=self.clear).pack(side="right", padx=5)
+        ctk.CTkButton(top, text="Exportar pstats", width=120, command=self.export_pstats).pack(side="right", padx=5)
+        ctk.CTkButton(top, text="Exportar JSON", width=120, command=self.export_json).pack(side="right", padx=5)
+
+        table_frame = ctk.CTkFrame(self.window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.table = ttk.Treeview(table_frame, columns=COLUMNS, show="headings")
+        for column in COLUMNS:
+            self.table.heading(column, text=column)
+            self.table.column(column, width=80, anchor="e")
+        self.table.column("Função", width=170, anchor="w")
+        self.table.column("Histograma (ms)", width=230, anchor="w")
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        self.table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill="y")
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        for item in self.table.get_children():
+            self.table.delete(item)
+        # Mais lentas primeiro
+        stats = sorted(profiler.stats().items(), key=lambda x: x[1]["p95_ms"], reverse=True)
+        for name, s in stats:
+            histogram = "  ".join(f"{label}:{count}" for label, count in s["histogram"].items())
+            self.table.insert("", tk.END, values=(
+                name, s["calls"], f"{s['mean_ms']:.1f}", f"{s['p95_ms']:.1f}", f"{s['max_ms']:.1f}",
+                "" if s["records"] is None else s["records"],
+                "" if s["figures"] is None else s["figures"],
+                histogram,
+            ))
+        self.refresh_job = self.window.after(REFRESH_MS, self.refresh)
+
+    def toggle(self):
+        profiler.enable(self.var_enabled.get())
+
+    def toggle_cprofile(self):
+        if self.var_cprofile.get():
+            profiler.start_cprofile()
+        else:
+            profiler.stop_cprofile()
+
+    def clear(self):
+        profiler.clear()
+
+    def export_json(self):
+        filepath = filedialog.asksaveasfilename(parent=self.window, defaultextension=".json",
+                                                filetypes=[("JSON", "*.json")])
+        if not filepath:
+            return
+        try:
+            profiler.export_json(filepath)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Falha na exportação:\n{str(e)}", parent=self.window)
+
+    def export_pstats(self):
+        if profiler.cprofile is None:
+            messagebox.showwarning("Aviso", "Ative o cProfile antes de exportar.", parent=self.window)
+            return
+        filepath = filedialog.asksaveasfilename(parent=self.window, defaultextension=".pstats",
+                                                filetypes=[("pstats", "*.pstats")])
+        if not filepath:
+            return
+        try:
+            profiler.export_pstats(filepath)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Falha na exportação:\n{str(e)}", parent=self.window)
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.window.after_cancel(self.refresh_job)
+        self.window.destroy()
@@ -0,0 +1,188 @@
+import csv
+import gzip
+import importlib.util
+import itertools
+import os
+
+import numpy as np
+
+from aggregates import ERROR_TYPES
+from columnar import ERROR_BITS, error_mask
+from jobs import BackgroundJob
+
+CSV_FIELDS = ['Matéria', 'Tópico', 'Subtópico', 'Descrição', 'Erros', 'Data']
+BATCH_SIZE = 5000
+# Texto da coluna Erros para cada combinação dos três tipos (máscara de bits)
+ERRORS_TEXT = [', '.join(tipo for tipo, bit in ERROR_BITS.items() if mask & bit) or 'Nenhum'
+               for mask in range(1 << len(ERROR_TYPES))]
+
+# Formato colunar: uma coluna por campo, mais uma booleana por tipo de erro
+TEXT_COLUMNS = ("id", "subject", "topic", "subtopic", "description", "created_at")
+COLUMNAR_SUFFIXES = ('.parquet', '.arrow', '.feather', '.npz')
+ARROW_SUFFIXES = ('.parquet', '.arrow', '.feather')
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def question_to_values(questao):
+    return (questao['subject'], questao['topic'], questao['subtopic'], questao['description'],
+            ERRORS_TEXT[error_mask(questao['erros'])], questao.get('created_at') or '')
+
+
+def has_pyarrow():
+    # Sem importar: o pyarrow é pesado e só é carregado ao exportar
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def export_formats():
+    # Tipos oferecidos no diálogo de salvar; Parquet/Arrow só com pyarrow
+    formats = [("CSV", "*.csv"), ("CSV compactado (gzip)", "*.gz")]
+    if has_pyarrow():
+        formats += [("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow")]
+    formats.append(("NumPy (colunar)", "*.npz"))
+    return formats
+
+
+def is_columnar_path(filepath):
+    return filepath.lower().endswith(COLUMNAR_SUFFIXES)
+
+
+def batches(questions, batch_size):
+    iterator = iter(questions)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(questions, filepath, progress=None, cancel_event=None, batch_size=BATCH_SIZE):
+    # Grava em blocos num arquivo ".part" e só o renomeia no fim: cancelar ou
+    # falhar no meio não deixa um CSV pela metade. ".gz" sai compactado.
+    part = filepath + '.part'
+    opener = gzip.open if filepath.lower().endswith('.gz') else open
+    count = 0
+    try:
+        with opener(part, 'wt', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_FIELDS)
+            for batch in batches(questions, batch_size):
+                _check_cancel(cancel_event)
+                writer.writerows([question_to_values(q) for q in batch])
+                count += len(batch)
+                if progress is not None:
+                    progress(count)
+        os.replace(part, filepath)
+    except BaseException:
+        _remove(part)
+        raise
+    return count
+
+
+def collect_columns(questions, progress=None, cancel_event=None, batch_size=BATCH_SIZE):
+    columns = {name: [] for name in TEXT_COLUMNS + ERROR_TYPES}
+    count = 0
+    for batch in batches(questions, batch_size):
+        _check_cancel(cancel_event)
+        for q in batch:
+            for name in TEXT_COLUMNS:
+                columns[name].append(q.get(name) or "")
+            erros = q.get("erros") or {}
+            for tipo in ERROR_TYPES:
+                columns[tipo].append(bool(erros.get(tipo)))
+        count += len(batch)
+        if progress is not None:
+            progress(count)
+    return columns, count
+
+
+def write_columnar(questions, filepath, progress=None, cancel_event=None, batch_size=BATCH_SIZE):
+    # Parquet/Arrow com pyarrow; sem ele, .npz com os textos em dicionário
+    # (valores distintos + códigos), que o NumPy lê sem pickle. Os valores
+    # ficam num bloco UTF-8 com as posições de cada um, como no Arrow: um
+    # array de largura fixa desperdiçaria espaço com descrições longas.
+    columns, count = collect_columns(questions, progress, cancel_event, batch_size)
+    _check_cancel(cancel_event)
+    part = filepath + '.part'
+    try:
+        if filepath.lower().endswith(ARROW_SUFFIXES):
+            import pyarrow as pa
+            table = pa.table(columns)
+            if filepath.lower().endswith('.parquet'):
+                import pyarrow.parquet as pq
+                pq.write_table(table, part)
+            else:
+                import pyarrow.feather as feather
+                feather.write_feather(table, part)
+        else:
+            arrays = {}
+            for name in TEXT_COLUMNS:
+                values, codes = dictionary_encode(columns[name])
+                arrays[f"{name}_text"], arrays[f"{name}_offsets"] = pack_strings(values)
+                arrays[f"{name}_codes"] = codes
+            for tipo in ERROR_TYPES:
+                arrays[tipo] = np.array(columns[tipo], dtype=bool)
+            with open(part, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+        os.replace(part, filepath)
+    except BaseException:
+        _remove(part)
+        raise
+    return count
+
+
+def dictionary_encode(values):
+    codes = {}
+    encoded = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=len(values))
+    return list(codes), encoded
+
+
+def pack_strings(values):
+    # Posições em caracteres do texto decodificado: values[i] = texto[o[i]:o[i+1]]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    return np.frombuffer("".join(values).encode('utf-8'), dtype=np.uint8), offsets
+
+
+def export_file(questions, filepath, progress=None, cancel_event=None):
+    if is_columnar_path(filepath):
+        return write_columnar(questions, filepath, progress, cancel_event)
+    return write_csv(questions, filepath, progress, cancel_event)
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExportCancelled()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ExportJob(BackgroundJob):
+    # Exportação numa thread separada, como a importação: a interface
+    # acompanha o progresso pela fila e pode cancelar. "questions" deve ser
+    # uma cópia (lista) feita na thread da interface.
+
+    def __init__(self, questions, filepath):
+        super().__init__()
+        self.questions = questions
+        self.filepath = filepath
+        self.total = len(questions)
+
+    def run(self):
+        def progress(count):
+            self.put(("progress", count, count / (self.total or 1)))
+        try:
+            count = export_file(self.questions, self.filepath, progress, self.cancel_event)
+        except ExportCancelled:
+            self.put(("cancelled", None, None))
+        except Exception as e:
+            self.put(("error", e, None))
+        else:
+            self.put(("done", count, 1.0))
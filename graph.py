@@ -1,14 +1,30 @@
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import chardet
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import json
-import csv
-from collections import defaultdict
-import numpy as np
 import customtkinter as ctk
-from matplotlib.ticker import MultipleLocator
+from datagrid import VirtualTreeview
+from core import format_row
+from dataset import Dataset, resolve_data_path
+from exporter import ExportJob, export_formats
+from scheduler import RefreshScheduler
+from profiling import profiler, timed, configure_from_env
+from debug_panel import ProfilePanel
+
+# Matplotlib (gráficos) e chardet (importação) só são importados quando
+# usados pela primeira vez: a janela abre sem esperar por eles
+
+ALL_SUBJECTS = "Todas as matérias"
+ALL_TOPICS = "Todos os tópicos"
+ALL_SUBTOPICS = "Todos os subtópicos"
+ERROR_FILTERS = {"Todos os erros": None, "Conteúdo": "conteudo", "Atenção": "atencao", "Tempo": "tempo"}
+RANKING_SIZES = ["5", "10", "20", "50"]
+# Blocos de importação gravados a cada passo do loop do Tk: o resto espera
+# na fila (limitada) e a janela continua respondendo entre um passo e outro
+IMPORT_BATCHES_PER_TICK = 2
+PROGRESS_PERIODS = {"Semanal": "week", "Mensal": "month"}
+PROGRESS_LINES = {"Questões": "questoes", "Conteúdo": "conteudo", "Atenção": "atencao", "Tempo": "tempo"}
 
 class ENEMAnalyzer:
     def __init__(self, root):
@@ -20,45 +36,136 @@ class ENEMAnalyzer:
     def setup_window(self):
         self.root.title("Analisador ENEM")
         self.root.geometry("800x600") 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Medição de desempenho: AUTODIAG_PROFILE=1 ou o painel do F12
+        configure_from_env()
+        self.profile_panel = None
+        self.root.bind("<F12>", lambda e: self.open_profile_panel())
         ctk.set_appearance_mode("white") 
         ctk.set_default_color_theme("dark-blue")  
         
     def initialize_data(self):
-        self.questions = []
+        # Até o carregamento em segundo plano terminar, a janela usa um conjunto
+        # vazio, só de leitura; o formulário já aparece preenchível
+        self.data = Dataset('enem_data.json', read_only=True)
+        self.loaded = False
+        self.load_queue = queue.Queue()
+        # Alterações em sequência geram um único redesenho
+        self.refresh = RefreshScheduler(self.root, {
+            "filter": lambda subjects: self.refresh_filter(),
+            "charts": lambda subjects: self.update_charts(subjects if self.filter_index is None else None),
+            "subtopics": lambda subjects: self.update_subtopics_charts(subjects if self.filter_index is None else None),
+            "data": lambda subjects: self.update_data_view(),
+            "ranking": lambda subjects: self.update_ranking(),
+            "progress": lambda subjects: self.update_progress(),
+        })
+        self.filter_ids = None
+        self.filter_index = None
+        self.filter_job = None
         self.subjects = ["Física", "Matemática", "Biologia", "Química", 
                         "História", "Geografia", "Filosofia", "Sociologia", "Artes", "Literatura"]
         self.load_data()
-        self.root.after(100, self.update_initial_views)
-    
-    def update_initial_views(self):
-   
-        self.update_charts()
-        self.update_subtopics_charts()
-        self.update_data_view()
-        
+
+    @property
+    def questions(self):
+        return self.data.questions
+
+    @property
+    def index(self):
+        return self.data.index
+
+    @property
+    def chart_index(self):
+        # Contagens usadas pelos gráficos: todas, ou só as do filtro da Planilha
+        return self.filter_index if self.filter_index is not None else self.data.index
+
     def load_data(self):
+        # O arquivo é lido em outra thread; a janela não espera pelo JSON
+        self.load_started = time.perf_counter()
+        threading.Thread(target=self.load_worker, args=(self.data.path,), daemon=True).start()
+        self.root.after(50, self.poll_load)
+
+    def load_worker(self, path):
+        # SQLite ao lado do JSON (migrado na primeira vez), ou o próprio JSON.
+        # As gravações rodam numa thread própria; save_data garante tudo no disco
         try:
-            with open('enem_data.json', 'r') as f:
-                self.questions = json.load(f)
-        except:
-            self.questions = []
-    
+            data = Dataset(resolve_data_path(path), async_writes=True)
+            data.load()
+        except Exception as e:
+            self.load_queue.put((None, e))
+            return
+        self.load_queue.put((data, None))
+
+    def poll_load(self):
+        try:
+            data, error = self.load_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.poll_load)
+            return
+
+        if error is not None:
+            # Sem os dados, nada é gravado: a janela fica só de leitura e o
+            # arquivo não é sobrescrito ao fechar
+            self.add_button.configure(text="Indisponível")
+            messagebox.showerror("Erro", f"Falha ao carregar os dados:\n{error}\n\n"
+                                         "Nenhuma alteração será gravada nesta sessão.")
+            return
+
+        self.data = data
+        self.loaded = True
+        self.data.maybe_compact()
+        if profiler.enabled:
+            profiler.record("load_data", time.perf_counter() - self.load_started, len(self.questions))
+        self.add_button.configure(state="normal", text="Adicionar")
+        self.import_button.configure(state="normal")
+        self.mark_changed(None)
+
+    @timed("save_data", records=lambda self: len(self.questions))
     def save_data(self):
-        with open('enem_data.json', 'w') as f:
-            json.dump(self.questions, f, indent=2)
+        # Grava um snapshot completo (usado ao fechar a janela)
+        if self.loaded:
+            self.data.save()
+
+    def mark_changed(self, subjects, data_view=True):
+        views = ["filter", "charts", "subtopics", "ranking", "progress"]
+        if data_view or self.filter_ids is not None:
+            views.append("data")
+        self.refresh.mark(*views, subjects=subjects)
+
+    def open_profile_panel(self):
+        if self.profile_panel is not None and self.profile_panel.window.winfo_exists():
+            self.profile_panel.window.lift()
+            return
+        self.profile_panel = ProfilePanel(self.root)
+
+    def on_close(self):
+        try:
+            self.save_data()
+        except Exception as e:
+            # Alterações que não chegaram ao disco: o usuário decide se fecha
+            if not messagebox.askyesno("Erro ao salvar",
+                                       f"Algumas alterações não foram gravadas:\n{e}\n\n"
+                                       "Fechar mesmo assim e perdê-las?"):
+                return
+        self.root.destroy()
     
     def create_widgets(self):
-        self.notebook = ctk.CTkTabview(self.root)
+        self.notebook = ctk.CTkTabview(self.root, command=self.on_tab_change)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         self.register_tab = self.notebook.add("Cadastrar")
         self.charts_tab = self.notebook.add("Gráficos")
         self.subtopics_tab = self.notebook.add("Subtópicos") 
         self.data_tab = self.notebook.add("Planilha")
+        self.study_tab = self.notebook.add("Estudar")
+        self.progress_tab = self.notebook.add("Progresso")
         
+        # As abas de gráficos são montadas na primeira visita
+        self.topic_charts = None
+        self.subtopic_charts = None
+        self.fig_progress = None
         self.create_register_tab()
-        self.create_charts_tab()
-        self.create_subtopics_tab()  
         self.create_data_tab()
+        self.create_study_tab()
         
     def create_register_tab(self):
         frame = self.notebook.tab("Cadastrar")
@@ -100,11 +207,17 @@ class ENEMAnalyzer:
         ctk.CTkCheckBox(checkbox_frame, text="Atenção", variable=self.var_atencao).pack(side='left', padx=5)
         ctk.CTkCheckBox(checkbox_frame, text="Tempo", variable=self.var_tempo).pack(side='left', padx=5)
         
-        ctk.CTkButton(frame, text="Adicionar", command=self.save_question).grid(row=4, column=1, pady=10, sticky='e')
+        self.add_button = ctk.CTkButton(frame, text="Carregando...", state="disabled", command=self.save_question)
+        self.add_button.grid(row=4, column=1, pady=10, sticky='e')
         
         frame.columnconfigure(1, weight=1)
     
     def create_charts_tab(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from charts import SubjectChartManager
+        from chartstyle import TOPIC_STYLE
+
         frame = self.notebook.tab("Gráficos")
         
         # Container superior 
@@ -115,7 +228,7 @@ class ENEMAnalyzer:
         pie_frame = ctk.CTkFrame(pie_container)
         pie_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
         
-        self.fig_pie = plt.Figure(figsize=(5,3))
+        self.fig_pie = Figure(figsize=(5,3))
         self.canvas_pie = FigureCanvasTkAgg(self.fig_pie, pie_frame)
         self.canvas_pie.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
@@ -142,8 +255,15 @@ class ENEMAnalyzer:
         # Frame para os gráficos de barras dentro do scrollable frame
         self.bar_frame = ctk.CTkFrame(self.bar_scroll_frame)
         self.bar_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.pie_counts = None
+        self.pie_dirty = False
+        self.topic_charts = SubjectChartManager(self.bar_frame, "Tópicos de {}", scroll_frame=self.bar_scroll_frame,
+                                                **TOPIC_STYLE)
     
     def create_subtopics_tab(self):
+        from charts import SubjectChartManager
+        from chartstyle import SUBTOPIC_STYLE
+
         frame = self.notebook.tab("Subtópicos")
         
         # Container com scroll para os gráficos de subtópicos
@@ -153,42 +273,251 @@ class ENEMAnalyzer:
         # Frame para os gráficos de subtópicos dentro do scrollable frame
         self.subtopics_frame = ctk.CTkFrame(self.subtopics_scroll_frame)
         self.subtopics_frame.pack(fill=tk.BOTH, expand=True, padx=8, pady=5)
+        self.subtopic_charts = SubjectChartManager(self.subtopics_frame, "Subtópicos de {}",
+                                                   scroll_frame=self.subtopics_scroll_frame,
+                                                   empty_text="Nenhum dado disponível", **SUBTOPIC_STYLE)
     
     def create_data_tab(self):
         frame = self.notebook.tab("Planilha")
+
+        self.create_filter_bar(frame)
         
-        self.tree = ttk.Treeview(frame, columns=("Matéria", "Tópico", "Subtópico", "Descrição", "Erro"), show="headings")
-        self.tree.heading("Matéria", text="Matéria")
-        self.tree.heading("Tópico", text="Tópico")
-        self.tree.heading("Subtópico", text="Subtópico")
-        self.tree.heading("Descrição", text="Descrição")
-        self.tree.heading("Erro", text="Erro")
-        
-        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # Só as linhas visíveis viram itens da Treeview
+        self.grid = VirtualTreeview(frame, ("Matéria", "Tópico", "Subtópico", "Descrição", "Erro"),
+                                    row_count=lambda: len(self.visible_ids()), get_row=self.get_row)
+        self.tree = self.grid.tree
+        self.grid.pack()
         
         btn_frame = ctk.CTkFrame(frame)
         btn_frame.pack(fill=tk.X, padx=5, pady=5)
 
-        ctk.CTkButton(btn_frame, text="Importar CSV", command=self.import_csv).grid(row=0, column=0, padx=5)
+        self.import_button = ctk.CTkButton(btn_frame, text="Importar CSV", state="disabled", command=self.import_csv)
+        self.import_button.grid(row=0, column=0, padx=5)
         ctk.CTkButton(btn_frame, text="Exportar CSV", command=self.export_csv).grid(row=0, column=1, padx=5)
         ctk.CTkButton(btn_frame, text="Excluir", command=self.delete_selected).grid(row=0, column=2, padx=5)
 
         btn_frame.columnconfigure(0, weight=1)
         btn_frame.columnconfigure(1, weight=1)
         btn_frame.columnconfigure(2, weight=1)
+
+        # Progresso da importação (só aparece enquanto um CSV está sendo lido)
+        self.import_job = None
+        self.import_frame = ctk.CTkFrame(frame)
+        self.import_label = ctk.CTkLabel(self.import_frame, text="")
+        self.import_label.pack(side="left", padx=5)
+        self.import_progress = ctk.CTkProgressBar(self.import_frame)
+        self.import_progress.pack(side="left", fill=tk.X, expand=True, padx=5)
+        ctk.CTkButton(self.import_frame, text="Cancelar", width=80, command=self.cancel_import).pack(side="right", padx=5)
+
+        # Progresso da exportação, no mesmo formato
+        self.export_job = None
+        self.export_frame = ctk.CTkFrame(frame)
+        self.export_label = ctk.CTkLabel(self.export_frame, text="")
+        self.export_label.pack(side="left", padx=5)
+        self.export_progress = ctk.CTkProgressBar(self.export_frame)
+        self.export_progress.pack(side="left", fill=tk.X, expand=True, padx=5)
+        ctk.CTkButton(self.export_frame, text="Cancelar", width=80, command=self.cancel_export).pack(side="right", padx=5)
         
         self.update_data_view()
     
+    def create_study_tab(self):
+        frame = self.notebook.tab("Estudar")
+
+        top_frame = ctk.CTkFrame(frame)
+        top_frame.pack(fill=tk.X, padx=5, pady=5)
+        ctk.CTkLabel(top_frame, text="Onde você mais erra (conteúdo pesa 3, atenção 2, tempo 1)").pack(side="left", padx=5)
+        self.ranking_size = ctk.CTkComboBox(top_frame, values=RANKING_SIZES, width=70,
+                                            command=lambda value: self.update_ranking())
+        self.ranking_size.set("10")
+        self.ranking_size.pack(side="right", padx=5)
+        ctk.CTkLabel(top_frame, text="Mostrar:").pack(side="right")
+
+        columns = ("Posição", "Matéria", "Tópico", "Subtópico", "Pontuação", "Questões")
+        self.ranking_table = ttk.Treeview(frame, columns=columns, show="headings")
+        for col in columns:
+            self.ranking_table.heading(col, text=col)
+            self.ranking_table.column(col, width=60 if col in ("Posição", "Pontuação", "Questões") else 140)
+        self.ranking_table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.ranking_dirty = False
+
+    def create_progress_tab(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        frame = self.notebook.tab("Progresso")
+
+        top_frame = ctk.CTkFrame(frame)
+        top_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.progress_period = ctk.CTkComboBox(top_frame, values=list(PROGRESS_PERIODS), width=100,
+                                               command=lambda value: self.update_progress())
+        self.progress_period.set("Semanal")
+        self.progress_period.pack(side="left", padx=5)
+        self.progress_subject = ctk.CTkComboBox(top_frame, values=[ALL_SUBJECTS] + self.subjects, width=170,
+                                                command=lambda value: self.update_progress())
+        self.progress_subject.set(ALL_SUBJECTS)
+        self.progress_subject.pack(side="left", padx=5)
+        self.progress_note = ctk.CTkLabel(top_frame, text="")
+        self.progress_note.pack(side="right", padx=5)
+
+        self.fig_progress = Figure(figsize=(7, 4))
+        self.canvas_progress = FigureCanvasTkAgg(self.fig_progress, frame)
+        self.canvas_progress.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.progress_dirty = False
+
+    @timed("update_progress", records=lambda self: len(self.questions))
+    def update_progress(self):
+        # As séries saem dos baldes mantidos pelo Dataset; o gráfico só é
+        # redesenhado com a aba aberta
+        if self.fig_progress is None or not self.loaded:
+            return
+        if self.notebook.get() != "Progresso":
+            self.progress_dirty = True
+            return
+        import chartstyle
+        from progress import downsample
+
+        self.progress_dirty = False
+        period = PROGRESS_PERIODS.get(self.progress_period.get(), "week")
+        subject = self.progress_subject.get()
+        subject = None if subject in ("", ALL_SUBJECTS) else subject
+
+        series = {}
+        keys = []
+        for label, measure in PROGRESS_LINES.items():
+            all_keys, values = self.data.progress.series(period, measure, subject)
+            keys, series[label] = downsample(all_keys, values)
+        # Muitos baldes: cada ponto soma alguns vizinhos
+        if keys and len(keys) < len(all_keys):
+            step = -(-len(all_keys) // len(keys))
+            unit = "semanas" if period == "week" else "meses"
+            self.progress_note.configure(text=f"Cada ponto soma {step} {unit}")
+        else:
+            self.progress_note.configure(text="")
+
+        self.fig_progress.clear()
+        ax = self.fig_progress.add_subplot(111)
+        if keys:
+            chartstyle.draw_progress(ax, keys, series)
+            self.fig_progress.tight_layout()
+        else:
+            ax.text(0.5, 0.5, "Nenhum dado disponível", ha='center', va='center')
+            ax.set_axis_off()
+        self.canvas_progress.draw_idle()
+
+    @timed("update_ranking", records=lambda self: len(self.questions))
+    def update_ranking(self):
+        # O ranking é mantido a cada alteração; a tabela só é preenchida com a aba aberta
+        if not self.loaded:
+            return
+        if self.notebook.get() != "Estudar":
+            self.ranking_dirty = True
+            return
+        self.ranking_dirty = False
+        try:
+            k = int(self.ranking_size.get())
+        except ValueError:
+            k = 10
+        self.ranking_table.delete(*self.ranking_table.get_children())
+        for position, item in enumerate(self.data.weakest(k), 1):
+            self.ranking_table.insert("", tk.END, values=(
+                position, item["subject"], item["topic"], item["subtopic"],
+                f"{item['score']:.1f}", item["questions"]))
+
+    def create_filter_bar(self, frame):
+        filter_frame = ctk.CTkFrame(frame)
+        filter_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        self.filter_subject = ctk.CTkComboBox(filter_frame, values=[ALL_SUBJECTS] + self.subjects, width=150,
+                                              command=self.on_filter_subject)
+        self.filter_subject.set(ALL_SUBJECTS)
+        self.filter_subject.grid(row=0, column=0, padx=2, pady=2)
+
+        self.filter_topic = ctk.CTkComboBox(filter_frame, values=[ALL_TOPICS], width=150,
+                                            command=lambda _: self.schedule_filter())
+        self.filter_topic.set(ALL_TOPICS)
+        self.filter_topic.grid(row=0, column=1, padx=2, pady=2)
+
+        self.filter_subtopic = ctk.CTkComboBox(filter_frame, values=[ALL_SUBTOPICS], width=150,
+                                               command=lambda _: self.schedule_filter())
+        self.filter_subtopic.set(ALL_SUBTOPICS)
+        self.filter_subtopic.grid(row=0, column=2, padx=2, pady=2)
+
+        self.filter_error = ctk.CTkComboBox(filter_frame, values=list(ERROR_FILTERS), width=130,
+                                            command=lambda _: self.schedule_filter())
+        self.filter_error.set("Todos os erros")
+        self.filter_error.grid(row=0, column=3, padx=2, pady=2)
+
+        self.filter_text = ctk.CTkEntry(filter_frame, placeholder_text="Buscar na descrição")
+        self.filter_text.grid(row=1, column=0, columnspan=3, padx=2, pady=2, sticky='ew')
+        self.filter_text.bind("<KeyRelease>", lambda e: self.schedule_filter())
+        for combo in (self.filter_topic, self.filter_subtopic):
+            combo.bind("<KeyRelease>", lambda e: self.schedule_filter())
+
+        self.var_charts_follow = tk.BooleanVar()
+        ctk.CTkCheckBox(filter_frame, text="Gráficos seguem o filtro", variable=self.var_charts_follow,
+                        command=self.apply_filter).grid(row=1, column=3, padx=2, pady=2, sticky='w')
+
+        self.filter_count = ctk.CTkLabel(filter_frame, text="")
+        self.filter_count.grid(row=0, column=4, rowspan=2, padx=5)
+        filter_frame.columnconfigure(4, weight=1)
+
+    def on_filter_subject(self, subject):
+        # Tópicos e subtópicos oferecidos são os da matéria escolhida
+        if subject in self.index.topics:
+            self.filter_topic.configure(values=[ALL_TOPICS] + sorted(self.index.topics[subject]))
+            self.filter_subtopic.configure(values=[ALL_SUBTOPICS] + sorted(self.index.subtopics[subject]))
+        else:
+            self.filter_topic.configure(values=[ALL_TOPICS])
+            self.filter_subtopic.configure(values=[ALL_SUBTOPICS])
+        self.filter_topic.set(ALL_TOPICS)
+        self.filter_subtopic.set(ALL_SUBTOPICS)
+        self.schedule_filter()
+
+    def schedule_filter(self):
+        # Espera a digitação parar um instante antes de filtrar
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(150, self.apply_filter)
+
+    def refresh_filter(self):
+        subject = self.filter_subject.get()
+        topic = self.filter_topic.get()
+        subtopic = self.filter_subtopic.get()
+        tipo = ERROR_FILTERS.get(self.filter_error.get())
+
+        self.filter_ids = self.data.filter_ids(
+            text=self.filter_text.get(),
+            subject=None if subject in ("", ALL_SUBJECTS) else subject,
+            topic=None if topic in ("", ALL_TOPICS) else topic,
+            subtopic=None if subtopic in ("", ALL_SUBTOPICS) else subtopic,
+            errors=(tipo,) if tipo else ()
+        )
+
+        if self.filter_ids is None:
+            self.filter_count.configure(text="")
+        else:
+            self.filter_count.configure(text=f"{len(self.filter_ids)} de {len(self.questions)}")
+
+        follow = self.filter_ids is not None and self.var_charts_follow.get()
+        self.filter_index = self.data.filtered_index(self.filter_ids) if follow else None
+
+    def apply_filter(self):
+        self.filter_job = None
+        self.refresh_filter()
+        self.grid.top = 0
+        self.grid.refresh()
+        self.update_charts()
+        self.update_subtopics_charts()
+
+    def visible_ids(self):
+        return self.questions.ids() if self.filter_ids is None else self.filter_ids
+
     def save_question(self):
         if not self.subject.get() or not self.topic.get():
             messagebox.showerror("Erro", "Preencha pelo menos Matéria e Tópico!")
             return
             
-        self.questions.append({
+        question = {
             "subject": self.subject.get(),
             "topic": self.topic.get(),
             "subtopic": self.subtopic.get(),
@@ -198,36 +527,38 @@ class ENEMAnalyzer:
                 "atencao": self.var_atencao.get(),
                 "tempo": self.var_tempo.get()
             }
-        })
-        
-        self.save_data()
+        }
+        self.data.add(question)
+        self.data.maybe_compact()
         self.clear_form()
-        self.update_charts()
-        self.update_subtopics_charts()
-        self.update_data_view()
+        # Sem filtro, a linha nova entra direto na Planilha
+        if self.filter_ids is None:
+            self.grid.row_inserted(len(self.questions) - 1)
+        self.mark_changed({question["subject"]}, data_view=False)
         messagebox.showinfo("Sucesso", "Questão salva com sucesso!")
     
     def delete_selected(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        # O iid de cada linha é o id da questão
+        selected = [iid for iid in self.tree.selection() if iid in self.questions]
+        if not selected:
             return
-        item_values = self.tree.item(selected_item, "values")
-
-        self.tree.delete(selected_item)
-
-        for q in self.questions:
-            if (
-                q["subject"] == item_values[0]
-                and q["topic"] == item_values[1]
-                and q["subtopic"] == item_values[2]
-                and (q["description"][:50] + "..." if len(q["description"]) > 50 else q["description"]) == item_values[3]
-            ):
-                self.questions.remove(q)
-                break
-        self.save_data()
-        self.update_charts()
-        self.update_subtopics_charts()
-        self.update_data_view()
+
+        subjects = {self.questions.get(iid)["subject"] for iid in selected}
+        # Uma linha sem filtro: só ela sai da Treeview, sem recarregar a janela
+        single = len(selected) == 1 and self.filter_ids is None and self.tree.exists(selected[0])
+        if single:
+            index = self.grid.start + self.tree.index(selected[0])
+        self.data.delete_many(selected)
+        self.data.maybe_compact()
+
+        # As linhas saem da Planilha já; o resto fica para o redesenho agrupado
+        if single:
+            self.grid.row_deleted(index, selected[0])
+        else:
+            if self.filter_ids is not None:
+                self.filter_ids = [i for i in self.filter_ids if i in self.questions]
+            self.grid.refresh()
+        self.mark_changed(subjects, data_view=False)
     
     def clear_form(self):
         self.subject.set('')
@@ -238,273 +569,216 @@ class ENEMAnalyzer:
         self.var_atencao.set(False)
         self.var_tempo.set(False)
     
-    def update_charts(self):
-        # Atualiza o gráfico de pizza
+    @timed("update_charts", records=lambda self: len(self.questions),
+           figures=lambda self: len(self.topic_charts.charts) if self.topic_charts else 0)
+    def update_charts(self, subjects=None):
+        if self.topic_charts is None:
+            return
+        index = self.chart_index
+        counts = index.subjects
+
+        # Pizza e tabela só mudam quando a contagem por matéria muda
+        if counts != self.pie_counts:
+            self.pie_counts = dict(counts)
+
+            # A pizza só é desenhada quando a aba estiver aberta
+            self.pie_dirty = True
+            if self.notebook.get() == "Gráficos":
+                self.draw_pie()
+
+            # Atualiza a tabela de contagem
+            for item in self.count_table.get_children():
+                self.count_table.delete(item)
+
+            for subject, count in index.sorted_subjects():
+                self.count_table.insert("", tk.END, values=(subject, count))
+
+        # Só as matérias com contagens diferentes são redesenhadas
+        self.topic_charts.update(index.topics, subjects)
+    
+    def draw_pie(self):
+        import chartstyle
+
+        self.pie_dirty = False
+        counts = self.pie_counts
         self.fig_pie.clear()
-        counts = defaultdict(int)
-        for q in self.questions:
-            counts[q["subject"]] += 1
-        
         ax = self.fig_pie.add_subplot(111)
         if counts:
-            ax.pie(counts.values(), labels=counts.keys(), autopct='%1.1f%%', textprops={'fontsize':8})
-            ax.set_position([0.1, 0.1, 0.8, 0.8])
+            chartstyle.draw_pie(ax, counts)
             self.fig_pie.tight_layout(pad=0)
-        self.canvas_pie.draw()
-        
-        # Atualiza a tabela de contagem
-        for item in self.count_table.get_children():
-            self.count_table.delete(item)
-        
-        sorted_counts = sorted(counts.items(), key=lambda x: x[1], reverse=True)
-        for subject, count in sorted_counts:
-            self.count_table.insert("", tk.END, values=(subject, count))
-        
-        # Limpa o frame de gráficos de barras anterior
-        for widget in self.bar_frame.winfo_children():
-            widget.destroy()
-        
-        # Agrupa os dados por matéria e tópico
-        subject_topics = defaultdict(lambda: defaultdict(int))
-        for q in self.questions:
-            subject = q['subject']
-            topic = q['topic']
-            subject_topics[subject][topic] += 1
-
-        if not subject_topics:
+        self.canvas_pie.draw_idle()
+
+    def on_tab_change(self):
+        # Desenha o que ficou pendente enquanto a aba estava escondida
+        tab = self.notebook.get()
+        if tab == "Gráficos":
+            if self.topic_charts is None:
+                self.create_charts_tab()
+                self.update_charts()
+            if self.pie_dirty:
+                self.draw_pie()
+            self.topic_charts.schedule_render()
+        elif tab == "Subtópicos":
+            if self.subtopic_charts is None:
+                self.create_subtopics_tab()
+                self.update_subtopics_charts()
+            self.subtopic_charts.schedule_render()
+        elif tab == "Estudar":
+            if self.ranking_dirty:
+                self.update_ranking()
+        elif tab == "Progresso":
+            if self.fig_progress is None:
+                self.create_progress_tab()
+                self.update_progress()
+            elif self.progress_dirty:
+                self.update_progress()
+
+    @timed("update_subtopics_charts", records=lambda self: len(self.questions),
+           figures=lambda self: len(self.subtopic_charts.charts) if self.subtopic_charts else 0)
+    def update_subtopics_charts(self, subjects=None):
+        if self.subtopic_charts is None:
             return
-        
-        # Para cada matéria, criar um gráfico separado
-        for subject, topics in subject_topics.items():
-            # Criar um frame separado para cada matéria
-            subject_frame = ctk.CTkFrame(self.bar_frame)
-            subject_frame.pack(fill=tk.X, expand=True, padx=10, pady=5, anchor="n")
-            
-            # Label para o título da matéria
-            ctk.CTkLabel(subject_frame, text=f"Tópicos de {subject}", font=("Arial", 14, "bold")).pack(pady=(5, 10))
-            
-            # Criar o gráfico
-            fig = plt.Figure(figsize=(7, max(4, len(topics) * 0.4)))
-            ax = fig.add_subplot(111)
-            
-            # Ordenar os tópicos por contagem
-            sorted_topics = sorted(topics.items(), key=lambda x: x[1], reverse=True)
-            topic_names = [t[0] for t in sorted_topics]
-            topic_counts = [t[1] for t in sorted_topics]
-            
-            # Criar o gráfico de barras
-            bars = ax.bar(topic_names, topic_counts, width=0.6, color='#4a6fa5')
-            
-            # Configurações do gráfico
-            ax.grid(axis='y', linestyle='--', alpha=0.7)
-            ax.set_xticklabels(topic_names, rotation=20, fontsize=9)
-            ax.tick_params(axis='y', labelsize=9)
-            ax.set_ylim(0, max(topic_counts) * 1.2)  # Espaço extra para os valores acima das barras
-            ax.yaxis.set_major_locator(MultipleLocator(1))
-            
-            # Adicionar valores em cima das barras
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=9)
-            
-            # Ajustar o layout
-            fig.tight_layout()
-            
-            # Criar canvas para o gráfico
-            canvas = FigureCanvasTkAgg(fig, subject_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    def update_subtopics_charts(self):
-        # Limpa o frame de gráficos de subtópicos
-        for widget in self.subtopics_frame.winfo_children():
-            widget.destroy()
-        
-        # Agrupa os dados por matéria e subtópico
-        subject_subtopics = defaultdict(lambda: defaultdict(int))
-        for q in self.questions:
-            subject = q['subject']
-            subtopic = q['subtopic'] or "Sem subtópico"
-            subject_subtopics[subject][subtopic] += 1
-        
-        if not subject_subtopics:
-            # Se não houver dados, exibe uma mensagem
-            no_data_label = ctk.CTkLabel(self.subtopics_frame, text="Nenhum dado disponível")
-            no_data_label.pack(expand=True, pady=45)
-            return
-        
-        # Para cada matéria, criar um gráfico separado
-        for subject, subtopics in subject_subtopics.items():
-            # Criar um frame separado para cada matéria
-            subject_frame = ctk.CTkFrame(self.subtopics_frame)
-            subject_frame.pack(fill=tk.X, expand=True, padx=10, pady=5, anchor="n")
-            
-            # Label para o título da matéria
-            ctk.CTkLabel(subject_frame, text=f"Subtópicos de {subject}", font=("Arial", 14, "bold")).pack(pady=(5, 10))
-            
-            # Criar o gráfico
-            fig = plt.Figure(figsize=(7, max(4, len(subtopics) * 0.4)))
-            ax = fig.add_subplot(111)
-            
-            # Ordenar os subtópicos por contagem
-            sorted_subtopics = sorted(subtopics.items(), key=lambda x: x[1], reverse=True)
-            subtopic_names = [t[0] for t in sorted_subtopics]
-            subtopic_counts = [t[1] for t in sorted_subtopics]
-            
-            # Criar o gráfico de barras
-            bars = ax.bar(subtopic_names, subtopic_counts, width=0.5, color='#4a6fa5')
-            
-            # Configurações do gráfico
-            ax.grid(axis='y', linestyle='--', alpha=0.7)
-            ax.set_xticklabels(subtopic_names, ha='right', rotation=45, fontsize=7)
-            ax.tick_params(axis='y', labelsize=9)
-            ax.set_ylim(0, max(subtopic_counts) * 1.2)  # Espaço extra para os valores acima das barras
-            ax.yaxis.set_major_locator(MultipleLocator(1))
-            
-            # Adicionar valores em cima das barras
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=9)
-            
-            # Ajustar o layout
-            fig.tight_layout()
-            
-            # Criar canvas para o gráfico
-            canvas = FigureCanvasTkAgg(fig, subject_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.subtopic_charts.update(self.chart_index.subtopics, subjects)
     
+    def get_row(self, index):
+        q = self.questions.get(self.visible_ids()[index])
+        return q["id"], format_row(q)
+
+    @timed("update_data_view", records=lambda self: len(self.visible_ids()))
     def update_data_view(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        for q in self.questions:
-            erros = q.get("erros", {})
-            erro_str = ", ".join([
-                tipo.capitalize()
-                for tipo, marcado in erros.items()
-                if marcado
-            ]) if erros else ""
-
-            self.tree.insert("", tk.END, values=(
-                q["subject"],
-                q["topic"],
-                q["subtopic"],
-                q["description"][:120] + "..." if len(q["description"]) >120 else q["description"],
-                erro_str
-            ))
+        self.grid.refresh()
     
     def import_csv(self):
-        filepath = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        from importer import ImportJob
+
+        if self.import_job is not None:
+            return
+        formats = export_formats()
+        patterns = " ".join(pattern for _, pattern in formats)
+        filepath = filedialog.askopenfilename(filetypes=[("Arquivos suportados", patterns)] + formats)
         if not filepath:
             return
 
-        try:
-            with open(filepath, 'rb') as f:
-                encoding = chardet.detect(f.read())['encoding']
-
-            with open(filepath, 'r', newline='', encoding=encoding) as csvfile:
-                try:
-                    dialect = csv.Sniffer().sniff(csvfile.read(1024))
-                    csvfile.seek(0)
-                except:
-                    dialect = csv.excel_tab
-                    csvfile.seek(0)
-            
-                reader = csv.DictReader(csvfile, dialect=dialect)
-                imported_count = 0
-            
-                for row in reader:
-                    try:
-                        if not any(row.values()):
-                            continue
-                        
-                        subject = row.get('Matéria', '').strip()
-                        topic = row.get('Tópico', '').strip()
-                        subtopic = row.get('Subtópico', '').strip()
-                        description = row.get('Descrição', '').strip()
-                        erros_str = row.get('Erros', '').strip().lower()  
-                    
-                        if not subject or not topic:
-                            print(f"Linha ignorada - faltam Matéria ou Tópico: {row}")
-                            continue
-                        
-                        erros_dict = {
-                            "conteudo": False,
-                            "atencao": False,
-                            "tempo": False
-                        }
-                    
-                        if erros_str:
-                            erros_dict = {
-                                "conteudo": any(p in erros_str for p in ['conteudo', 'conteúdo', 'content']),
-                                "atencao": any(p in erros_str for p in ['atencao', 'atenção', 'attention']),
-                                "tempo": any(p in erros_str for p in ['tempo', 'time'])
-                            }
-                    
-                        question = {
-                            "subject": subject,
-                            "topic": topic,
-                            "subtopic": subtopic,
-                            "description": description,
-                            "erros": erros_dict
-                        }
-                    
-                        self.questions.append(question)
-                        imported_count += 1
-                    
-                    except Exception as e:
-                        print(f"Erro ao processar linha: {row}\nErro: {str(e)}")
-                        continue
-
-                self.save_data()
-                self.update_charts()
-                self.update_subtopics_charts()
-                self.update_data_view()
-            
-            if imported_count > 0:
-                messagebox.showinfo("Sucesso", f"{imported_count} questões importadas com sucesso!")
+        # Lê e interpreta o arquivo em outra thread; a janela continua livre
+        self.import_job = ImportJob(filepath)
+        self.imported_count = 0
+        self.import_started = time.perf_counter()
+        self.import_progress.set(0)
+        self.import_label.configure(text="Importando...")
+        self.import_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.import_job.start()
+        self.root.after(50, self.poll_import)
+
+    def cancel_import(self):
+        if self.import_job is not None:
+            self.import_job.cancel()
+            self.import_label.configure(text="Cancelando...")
+
+    def poll_import(self):
+        job = self.import_job
+        error = None
+        finished = False
+        received = set()
+
+        messages = job.poll(IMPORT_BATCHES_PER_TICK)
+        for kind, payload, progress in messages:
+            if kind == "batch":
+                if job.cancelled:
+                    continue
+                self.commit_import_batch(payload)
+                self.import_progress.set(progress)
+                received.update(q["subject"] for q in payload)
+            elif kind == "error":
+                error = payload
+                finished = True
             else:
-                messagebox.showwarning("Aviso", "Nenhuma questão foi importada. Verifique o formato do arquivo.")
-                
-        except Exception as e:
-            messagebox.showerror("Erro", f"Falha na importação:\n{str(e)}")
+                finished = True
+
+        if received:
+            self.data.maybe_compact()
+            self.mark_changed(received)
+            self.import_label.configure(text=f"{self.imported_count} questões importadas...")
+
+        if job.cancelled and not job.thread.is_alive():
+            finished = True
+        if not finished:
+            # Fila com mais blocos: volta logo, depois de o Tk tratar os eventos
+            self.root.after(1 if len(messages) == IMPORT_BATCHES_PER_TICK else 50, self.poll_import)
+            return
+
+        self.import_frame.pack_forget()
+        self.import_job = None
+        # A importação vai da escolha do arquivo ao último bloco, sem o diálogo
+        if profiler.enabled:
+            profiler.record("import_csv", time.perf_counter() - self.import_started, self.imported_count)
+
+        if error is not None:
+            messagebox.showerror("Erro", f"Falha na importação:\n{str(error)}")
+        elif job.cancelled:
+            messagebox.showwarning("Aviso", f"Importação cancelada. {self.imported_count} questões foram importadas.")
+        elif self.imported_count > 0:
+            messagebox.showinfo("Sucesso", f"{self.imported_count} questões importadas com sucesso!")
+        else:
+            messagebox.showwarning("Aviso", "Nenhuma questão foi importada. Verifique o formato do arquivo.")
+
+    @timed("import_batch", records=lambda self: self.imported_count)
+    def commit_import_batch(self, batch):
+        self.data.add_many(batch)
+        self.imported_count += len(batch)
 
     def export_csv(self):
+        if self.export_job is not None:
+            return
         if not self.questions:
             messagebox.showwarning("Aviso", "Nenhum dado para exportar!")
             return
 
         filepath = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV Files", "*.csv")]
+            filetypes=export_formats()
         )
         if not filepath:
             return
 
-        try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['Matéria', 'Tópico', 'Subtópico', 'Descrição', 'Erros']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for questao in self.questions:
-                    erros_str = ', '.join([k for k, v in questao['erros'].items() if v])
-                    writer.writerow({
-                        'Matéria': questao['subject'],
-                        'Tópico': questao['topic'],
-                        'Subtópico': questao['subtopic'],
-                        'Descrição': questao['description'],
-                        'Erros': erros_str or 'Nenhum'
-                    })
-            
-            messagebox.showinfo("Sucesso", "Dados exportados com sucesso!")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Falha na exportação:\n{str(e)}")
+        # A cópia da lista é feita aqui; a gravação roda em outra thread
+        self.export_job = ExportJob(list(self.questions), filepath)
+        self.export_started = time.perf_counter()
+        self.export_progress.set(0)
+        self.export_label.configure(text="Exportando...")
+        self.export_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.export_job.start()
+        self.root.after(50, self.poll_export)
+
+    def cancel_export(self):
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.export_label.configure(text="Cancelando...")
+
+    def poll_export(self):
+        job = self.export_job
+        result = None
+        for kind, payload, progress in job.poll():
+            if kind == "progress":
+                self.export_progress.set(progress)
+                self.export_label.configure(text=f"{payload} de {job.total} questões exportadas...")
+            else:
+                result = (kind, payload)
+
+        if result is None:
+            self.root.after(50, self.poll_export)
+            return
+
+        self.export_frame.pack_forget()
+        self.export_job = None
+        kind, payload = result
+        if kind == "done":
+            if profiler.enabled:
+                profiler.record("export_csv", time.perf_counter() - self.export_started, payload)
+            messagebox.showinfo("Sucesso", f"{payload} questões exportadas com sucesso!")
+        elif kind == "cancelled":
+            messagebox.showwarning("Aviso", "Exportação cancelada. Nenhum arquivo foi gravado.")
+        else:
+            messagebox.showerror("Erro", f"Falha na exportação:\n{str(payload)}")
 
 if __name__ == "__main__":
     root = ctk.CTk()
@@ -0,0 +1,215 @@
+import csv
+import gzip
+import io
+import os
+
+import chardet
+import numpy as np
+
+from aggregates import ERROR_TYPES
+from core import parse_timestamp
+from exporter import ARROW_SUFFIXES, TEXT_COLUMNS, is_columnar_path
+from jobs import BackgroundJob
+
+ENCODING_SAMPLE_SIZE = 64 * 1024
+BATCH_SIZE = 500
+# Blocos prontos esperando a interface: com a fila cheia, a leitura para
+QUEUE_BATCHES = 8
+DELIMITERS = ",;\t|"
+
+
+def detect_encoding(filepath, sample_size=ENCODING_SAMPLE_SIZE):
+    # Só o começo do arquivo é lido para adivinhar a codificação
+    opener = gzip.open if is_gzip_path(filepath) else open
+    with opener(filepath, 'rb') as f:
+        sample = f.read(sample_size)
+    encoding = chardet.detect(sample)['encoding'] or 'utf-8'
+    # Um começo só com ASCII não garante o resto do arquivo; UTF-8 cobre os dois
+    if encoding.lower() == 'ascii':
+        encoding = 'utf-8'
+    return encoding
+
+
+def is_gzip_path(filepath):
+    return filepath.lower().endswith('.gz')
+
+
+def parse_erros(erros_str):
+    erros_str = erros_str.strip().lower()
+    if not erros_str:
+        return {"conteudo": False, "atencao": False, "tempo": False}
+    return {
+        "conteudo": any(p in erros_str for p in ['conteudo', 'conteúdo', 'content']),
+        "atencao": any(p in erros_str for p in ['atencao', 'atenção', 'attention']),
+        "tempo": any(p in erros_str for p in ['tempo', 'time'])
+    }
+
+
+def question_from_row(row):
+    if not any(row.values()):
+        return None
+
+    subject = (row.get('Matéria') or '').strip()
+    topic = (row.get('Tópico') or '').strip()
+    subtopic = (row.get('Subtópico') or '').strip()
+    description = (row.get('Descrição') or '').strip()
+
+    if not subject or not topic:
+        print(f"Linha ignorada - faltam Matéria ou Tópico: {row}")
+        return None
+
+    question = {
+        "subject": subject,
+        "topic": topic,
+        "subtopic": subtopic,
+        "description": description,
+        "erros": parse_erros(row.get('Erros') or '')
+    }
+    # A coluna Data (exportada pelo app) mantém a data de cadastro; sem ela,
+    # a questão recebe a data da importação
+    created_at = parse_timestamp(row.get('Data'))
+    if created_at:
+        question["created_at"] = created_at
+    return question
+
+
+def sniff_dialect(sample):
+    # Só separadores comuns: sem a lista, letras do cabeçalho podem ser
+    # tomadas como delimitador
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS)
+    except csv.Error:
+        pass
+    # O Sniffer se confunde com campos entre aspas; o cabeçalho decide
+    header = sample.splitlines()[0] if sample else ''
+    delimiter = max(DELIMITERS, key=header.count)
+    if not header.count(delimiter):
+        return csv.excel_tab
+
+    class Dialect(csv.excel):
+        pass
+    Dialect.delimiter = delimiter
+    return Dialect
+
+
+def iter_csv_batches(filepath, batch_size=BATCH_SIZE, cancel_event=None):
+    # Lê o CSV em blocos de "batch_size" questões; devolve (questões, progresso).
+    # O progresso vem da posição no arquivo em disco (compactado, se for .gz)
+    total = os.path.getsize(filepath) or 1
+    encoding = detect_encoding(filepath)
+
+    with open(filepath, 'rb') as raw:
+        stream = gzip.GzipFile(fileobj=raw) if is_gzip_path(filepath) else raw
+        csvfile = io.TextIOWrapper(stream, encoding=encoding, newline='')
+        dialect = sniff_dialect(csvfile.read(1024))
+        csvfile.seek(0)
+
+        reader = csv.DictReader(csvfile, dialect=dialect)
+        batch = []
+        for row in reader:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                question = question_from_row(row)
+            except Exception as e:
+                print(f"Erro ao processar linha: {row}\nErro: {str(e)}")
+                continue
+            if question is None:
+                continue
+
+            batch.append(question)
+            if len(batch) >= batch_size:
+                yield batch, raw.tell() / total
+                batch = []
+        if batch:
+            yield batch, 1.0
+
+
+def read_columns(filepath):
+    # Lê um arquivo gravado por exporter.write_columnar: {coluna: lista}
+    if filepath.lower().endswith(ARROW_SUFFIXES):
+        if filepath.lower().endswith('.parquet'):
+            import pyarrow.parquet as pq
+            table = pq.read_table(filepath)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(filepath)
+        return {name: table.column(name).to_pylist() for name in table.column_names}
+
+    columns = {}
+    with np.load(filepath) as data:
+        for name in TEXT_COLUMNS:
+            if f"{name}_codes" in data:
+                values = unpack_strings(data[f"{name}_text"], data[f"{name}_offsets"])
+                columns[name] = [values[code] for code in data[f"{name}_codes"].tolist()]
+        for tipo in ERROR_TYPES:
+            if tipo in data:
+                columns[tipo] = data[tipo].tolist()
+    return columns
+
+
+def unpack_strings(text, offsets):
+    text = text.tobytes().decode('utf-8')
+    offsets = offsets.tolist()
+    return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+def iter_columnar_batches(filepath, batch_size=BATCH_SIZE, cancel_event=None):
+    # O arquivo é lido de uma vez (é rápido); as questões saem em blocos. Os
+    # ids gravados são ignorados: como no CSV, cada questão importada é nova.
+    columns = read_columns(filepath)
+    total = len(columns.get("subject", ()))
+    empty = [""] * total
+    texts = {name: columns.get(name, empty) for name in ("subject", "topic", "subtopic", "description", "created_at")}
+    flags = {tipo: columns.get(tipo, [False] * total) for tipo in ERROR_TYPES}
+
+    for start in range(0, total, batch_size):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        batch = []
+        for i in range(start, min(total, start + batch_size)):
+            subject = (texts["subject"][i] or "").strip()
+            topic = (texts["topic"][i] or "").strip()
+            if not subject or not topic:
+                continue
+            question = {
+                "subject": subject,
+                "topic": topic,
+                "subtopic": (texts["subtopic"][i] or "").strip(),
+                "description": (texts["description"][i] or "").strip(),
+                "erros": {tipo: bool(flags[tipo][i]) for tipo in ERROR_TYPES},
+            }
+            created_at = parse_timestamp(texts["created_at"][i])
+            if created_at:
+                question["created_at"] = created_at
+            batch.append(question)
+        if batch:
+            yield batch, min(total, start + batch_size) / total
+
+
+def iter_batches(filepath, batch_size=BATCH_SIZE, cancel_event=None):
+    # CSV (também .csv.gz) ou um dos formatos colunares do exportador
+    if is_columnar_path(filepath):
+        return iter_columnar_batches(filepath, batch_size, cancel_event)
+    return iter_csv_batches(filepath, batch_size, cancel_event)
+
+
+class ImportJob(BackgroundJob):
+    # Importação em uma thread separada. A thread só lê e interpreta o
+    # arquivo; os blocos prontos ficam na fila para a interface consumir.
+    # A fila é limitada: se a interface atrasar, a thread espera em vez de
+    # acumular o arquivo inteiro na memória.
+
+    def __init__(self, filepath, batch_size=BATCH_SIZE, queue_batches=QUEUE_BATCHES):
+        super().__init__(maxsize=queue_batches)
+        self.filepath = filepath
+        self.batch_size = batch_size
+
+    def run(self):
+        try:
+            for batch, progress in iter_batches(self.filepath, self.batch_size, self.cancel_event):
+                self.put(("batch", batch, min(progress, 1.0)))
+        except Exception as e:
+            self.put(("error", e, None))
+        else:
+            self.put(("done", None, 1.0))
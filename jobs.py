@@ -0,0 +1,47 @@
+import queue
+import threading
+
+
+class BackgroundJob:
+    # Base da importação e da exportação: run() roda numa thread própria e
+    # manda mensagens (tipo, dados, progresso) pela fila; a interface lê com
+    # poll() num "after" e pode pedir cancel(). Com maxsize, a fila é
+    # limitada e a thread espera a interface consumir.
+
+    def __init__(self, maxsize=0):
+        self.messages = queue.Queue(maxsize=maxsize)
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        raise NotImplementedError
+
+    def put(self, message):
+        # Espera lugar na fila, mas desiste se a tarefa for cancelada
+        while True:
+            try:
+                self.messages.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                if self.cancelled:
+                    return
+
+    def poll(self, limit=None):
+        # Até "limit" mensagens das que já chegaram, sem bloquear
+        messages = []
+        while limit is None or len(messages) < limit:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return messages
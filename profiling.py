@@ -0,0 +1,149 @@
+import cProfile
+import functools
+import json
+import math
+import os
+import pstats
+import statistics
+import time
+from collections import deque
+
+# Medição opcional dos caminhos quentes. Liga com a variável de ambiente
+#   AUTODIAG_PROFILE=1         tempos por chamada
+#   AUTODIAG_PROFILE=cprofile  tempos + cProfile desde a abertura
+# ou pelo painel de depuração (F12). Desligado, o custo é um "if" por chamada.
+
+PROFILE_ENV = "AUTODIAG_PROFILE"
+HISTORY = 500
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.calls = {}
+        self.cprofile = None
+        self.cprofile_running = False
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def record(self, name, seconds, records=None, figures=None):
+        history = self.calls.get(name)
+        if history is None:
+            history = self.calls.setdefault(name, deque(maxlen=HISTORY))
+        history.append((seconds, records, figures))
+
+    def clear(self):
+        self.calls.clear()
+
+    def stats(self):
+        # Resumo das últimas HISTORY chamadas de cada função
+        # Cópias: a gravação do snapshot pode registrar tempos de outra thread
+        result = {}
+        for name, history in list(self.calls.items()):
+            history = tuple(history)
+            times = sorted(seconds for seconds, _, _ in history)
+            last_records = next((r for _, r, _ in reversed(history) if r is not None), None)
+            last_figures = next((f for _, _, f in reversed(history) if f is not None), None)
+            result[name] = {
+                "calls": len(times),
+                "mean_ms": statistics.fmean(times) * 1000,
+                "p50_ms": percentile(times, 0.5) * 1000,
+                "p95_ms": percentile(times, 0.95) * 1000,
+                "max_ms": times[-1] * 1000,
+                "records": last_records,
+                "figures": last_figures,
+                "histogram": histogram(times),
+            }
+        return result
+
+    def export_json(self, filepath):
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "calls": self.stats()}, f, indent=2)
+
+    # ---------- cProfile ----------
+
+    # Só a thread principal (a da interface) é perfilada; parar e voltar
+    # continua acumulando no mesmo perfil
+
+    def start_cprofile(self):
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+        if not self.cprofile_running:
+            self.cprofile.enable()
+            self.cprofile_running = True
+
+    def stop_cprofile(self):
+        if self.cprofile_running:
+            self.cprofile.disable()
+            self.cprofile_running = False
+
+    def export_pstats(self, filepath):
+        if self.cprofile is None:
+            return False
+        running = self.cprofile_running
+        self.stop_cprofile()
+        pstats.Stats(self.cprofile).dump_stats(filepath)
+        if running:
+            self.start_cprofile()
+        return True
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(math.ceil(fraction * len(sorted_values))) - 1)
+    return sorted_values[max(0, index)]
+
+
+def histogram(times):
+    # Faixas de tempo em potências de 2 ms: "<1", "1-2", "2-4", ...
+    buckets = {}
+    for seconds in times:
+        ms = seconds * 1000
+        if ms < 1:
+            label = "<1"
+        else:
+            low = 2 ** int(math.log2(ms))
+            label = f"{low}-{low * 2}"
+        buckets[label] = buckets.get(label, 0) + 1
+    return buckets
+
+
+profiler = Profiler()
+
+
+def timed(name, records=None, figures=None):
+    # records/figures: funções que recebem o mesmo "self" e dizem quantos
+    # registros/figuras a chamada envolveu
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                owner = args[0] if args else None
+                profiler.record(
+                    name, elapsed,
+                    records(owner) if records is not None else None,
+                    figures(owner) if figures is not None else None,
+                )
+        return wrapper
+    return decorator
+
+
+def instrument_method(cls, method_name, name):
+    # Mede um método de uma classe de fora do projeto (ex.: canvas.draw)
+    original = getattr(cls, method_name)
+    setattr(cls, method_name, timed(name)(original))
+
+
+def configure_from_env():
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if mode and mode not in ("0", "false", "no"):
+        profiler.enable()
+        if mode == "cprofile":
+            profiler.start_cprofile()
+    return profiler.enabled
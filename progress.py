@@ -0,0 +1,116 @@
+import math
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+
+from aggregates import ERROR_TYPES
+
+# Evolução no tempo: questões e erros por semana ou por mês, de cada matéria
+# e de todas juntas. Cada questão soma 1 nos baldes (período) da sua data de
+# cadastro; adicionar ou excluir custa O(1) e as séries saem dos baldes, sem
+# percorrer as questões.
+
+PERIODS = ("week", "month")
+QUESTIONS = "questoes"
+MEASURES = (QUESTIONS,) + ERROR_TYPES
+ALL = None
+# Acima disso, baldes vizinhos são somados antes de desenhar
+MAX_POINTS = 60
+
+
+def bucket_key(day, period):
+    # "day" = os 10 primeiros caracteres de "created_at" (ISO 8601 no fuso
+    # local do cadastro). Semana = a segunda-feira; mês = "AAAA-MM".
+    if period == "month":
+        return day[:7]
+    return week_start(day)
+
+
+@lru_cache(maxsize=4096)
+def week_start(day):
+    day = date.fromisoformat(day)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def next_bucket(key, period):
+    if period == "month":
+        year, month = int(key[:4]), int(key[5:7])
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f"{year:04d}-{month:02d}"
+    return (date.fromisoformat(key) + timedelta(days=7)).isoformat()
+
+
+class ProgressIndex:
+    # buckets[período][balde] -> Counter{(matéria ou ALL, medida): contagem}
+
+    def __init__(self, questions=()):
+        self.buckets = {period: defaultdict(Counter) for period in PERIODS}
+        # Carga inicial: as questões são agrupadas por dia, matéria e erros, e
+        # os grupos por balde; cada balde recebe uma soma só por grupo
+        days = Counter(group_key(q) for q in questions if q.get("created_at"))
+        for period in PERIODS:
+            groups = Counter()
+            for (day, subject, errors), count in days.items():
+                groups[bucket_key(day, period), subject, errors] += count
+            for (key, subject, errors), count in groups.items():
+                self._bump(period, key, subject, errors, count)
+
+    def add(self, question):
+        if question.get("created_at"):
+            self._update(*group_key(question), 1)
+
+    def remove(self, question):
+        if question.get("created_at"):
+            self._update(*group_key(question), -1)
+
+    def _update(self, day, subject, errors, delta):
+        for period in PERIODS:
+            self._bump(period, bucket_key(day, period), subject, errors, delta)
+
+    def _bump(self, period, key, subject, errors, delta):
+        counts = self.buckets[period][key]
+        for measure in (QUESTIONS,) + errors:
+            for group in (subject, ALL):
+                value = counts[group, measure] + delta
+                if value > 0:
+                    counts[group, measure] = value
+                else:
+                    del counts[group, measure]
+        # Balde vazio some: a série começa na primeira questão que existe
+        if not counts:
+            del self.buckets[period][key]
+
+    def series(self, period="week", measure=QUESTIONS, subject=ALL):
+        # (baldes, contagens) do primeiro ao último balde, com os vazios no meio
+        buckets = self.buckets[period]
+        if not buckets:
+            return [], []
+        keys = []
+        key, last = min(buckets), max(buckets)
+        while key <= last:
+            keys.append(key)
+            key = next_bucket(key, period)
+        return keys, [buckets[k][subject, measure] if k in buckets else 0 for k in keys]
+
+    def table(self, period="week", subject=ALL):
+        # Uma linha por balde: [balde, questões, conteúdo, atenção, tempo]
+        keys, _ = self.series(period, QUESTIONS, subject)
+        buckets = self.buckets[period]
+        return [[key] + [buckets[key][subject, measure] if key in buckets else 0 for measure in MEASURES]
+                for key in keys]
+
+
+def group_key(question):
+    erros = question.get("erros") or {}
+    return (question["created_at"][:10], question["subject"],
+            tuple(tipo for tipo in ERROR_TYPES if erros.get(tipo)))
+
+
+def downsample(keys, values, max_points=MAX_POINTS):
+    # Soma grupos de baldes vizinhos para desenhar no máximo max_points
+    # pontos; cada grupo fica com o nome do seu primeiro balde
+    if len(keys) <= max_points:
+        return list(keys), list(values)
+    step = math.ceil(len(keys) / max_points)
+    return ([keys[i] for i in range(0, len(keys), step)],
+            [sum(values[i:i + step]) for i in range(0, len(values), step)])
@@ -0,0 +1,144 @@
+import heapq
+import math
+from datetime import datetime, timezone
+
+from aggregates import ERROR_TYPES, NO_SUBTOPIC
+
+# Peso de cada tipo de erro na pontuação de um (matéria, tópico, subtópico):
+# falta de conteúdo pede mais estudo que falta de atenção ou de tempo
+DEFAULT_WEIGHTS = {"conteudo": 3.0, "atencao": 2.0, "tempo": 1.0}
+SECONDS_PER_DAY = 86400
+# Expoente máximo do peso de um erro (ver WeaknessRanking): acima dele a
+# referência de tempo é movida. e^10 ≈ 22000 mantém somas e subtrações
+# precisas entre erros novos e antigos.
+MAX_EXPONENT = 10.0
+
+
+class WeaknessRanking:
+    # Pontuação de cada (matéria, tópico, subtópico) pela soma ponderada dos
+    # erros, mantida a cada questão adicionada ou removida, e os K piores
+    # lidos de um heap com remoção preguiçosa: cada alteração empilha a
+    # pontuação nova em O(log N) e as entradas velhas são descartadas quando
+    # aparecem no topo. Nada é reordenado por inteiro.
+    #
+    # Com half_life_days, erros antigos valem menos. Em vez de reduzir todas
+    # as pontuações com o passar do tempo, cada erro entra com peso
+    # exp(λ·(t - referência)), que cresce com a data: a ordem entre os itens
+    # é a mesma do decaimento, e a pontuação exibida é só multiplicada por
+    # exp(-λ·(agora - referência)). A referência começa em "agora"; quando um
+    # erro novo passaria de MAX_EXPONENT, ela é movida para a data dele e as
+    # pontuações são reescaladas, para os pesos não crescerem sem limite.
+
+    def __init__(self, questions=(), weights=None, half_life_days=None, now=None):
+        if half_life_days is not None and not half_life_days > 0:
+            raise ValueError("a meia-vida deve ser maior que zero")
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.decay = math.log(2) / (half_life_days * SECONDS_PER_DAY) if half_life_days else 0.0
+        self.reference = current_time() if now is None else now
+        self.scores = {}
+        self.counts = {}
+        self.heap = []
+        for q in questions:
+            self._update(q, 1, push=False)
+        self.heap = [(-score, key) for key, score in self.scores.items()]
+        heapq.heapify(self.heap)
+
+    def add(self, question):
+        self._update(question, 1)
+
+    def remove(self, question):
+        self._update(question, -1)
+
+    def key(self, question):
+        return (question["subject"], question["topic"], question["subtopic"] or NO_SUBTOPIC)
+
+    def weight(self, question):
+        erros = question.get("erros") or {}
+        weight = sum(self.weights.get(tipo, 0.0) for tipo in ERROR_TYPES if erros.get(tipo))
+        if self.decay and weight:
+            timestamp = question_time(question)
+            if timestamp is not None:
+                exponent = self.decay * (timestamp - self.reference)
+                if exponent > MAX_EXPONENT:
+                    self.rebase(timestamp)
+                    exponent = 0.0
+                weight *= math.exp(exponent)
+        return weight
+
+    def rebase(self, reference):
+        # Move a referência para frente: todas as pontuações diminuem pelo
+        # mesmo fator, então a ordem não muda; o heap é refeito com os valores novos
+        factor = math.exp(-self.decay * (reference - self.reference))
+        self.reference = reference
+        self.scores = {key: score * factor for key, score in self.scores.items()}
+        self.heap = [(-s, k) for k, s in self.scores.items()]
+        heapq.heapify(self.heap)
+
+    def _update(self, question, sign, push=True):
+        key = self.key(question)
+        count = self.counts.get(key, 0) + sign
+        if count <= 0:
+            # Sem questões, o item some; a entrada no heap fica velha
+            self.counts.pop(key, None)
+            self.scores.pop(key, None)
+            return
+        self.counts[key] = count
+        # O peso antes da pontuação: calculá-lo pode mover a referência
+        weight = self.weight(question)
+        score = max(0.0, self.scores.get(key, 0.0) + sign * weight)
+        self.scores[key] = score
+        if push:
+            heapq.heappush(self.heap, (-score, key))
+            # Entradas velhas demais: refaz o heap com as pontuações atuais (amortizado)
+            if len(self.heap) > 2 * len(self.scores) + 64:
+                self.heap = [(-s, k) for k, s in self.scores.items()]
+                heapq.heapify(self.heap)
+
+    def top(self, k=10, now=None):
+        # Os k itens de maior pontuação, em O(k log N)
+        found = []
+        seen = set()
+        while self.heap and len(found) < k:
+            entry = heapq.heappop(self.heap)
+            neg_score, key = entry
+            if key in seen or self.scores.get(key) != -neg_score:
+                continue
+            if neg_score >= 0:
+                # Daqui para baixo só há itens sem erros
+                heapq.heappush(self.heap, entry)
+                break
+            seen.add(key)
+            found.append(entry)
+        for entry in found:
+            heapq.heappush(self.heap, entry)
+
+        scale = self.scale(now)
+        return [
+            {"subject": key[0], "topic": key[1], "subtopic": key[2],
+             "score": -neg_score * scale, "questions": self.counts[key]}
+            for neg_score, key in found
+        ]
+
+    def scale(self, now=None):
+        if not self.decay:
+            return 1.0
+        now = current_time() if now is None else now
+        return math.exp(min(MAX_EXPONENT, -self.decay * (now - self.reference)))
+
+
+def current_time():
+    return datetime.now(timezone.utc).timestamp()
+
+
+def question_time(question):
+    # "created_at" em ISO 8601; questões sem data contam como se fossem da referência
+    value = question.get("created_at")
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
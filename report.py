@@ -0,0 +1,229 @@
+import base64
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregates import ERROR_TYPES
+from chartstyle import SUBTOPIC_STYLE, TOPIC_STYLE, draw_bars, draw_pie, figure_height, ordered_counts
+
+# Relatório de diagnóstico por aluno, fora da tela: os mesmos gráficos das
+# abas (pizza, tópicos e subtópicos de cada matéria) desenhados com o backend
+# Agg em PNG e montados em HTML, PDF ou numa pasta de imagens.
+#
+# Cada gráfico vira um PNG no cache, com nome igual ao hash das contagens que
+# ele mostra: num relatório repetido, só as matérias que mudaram são
+# desenhadas de novo. Os gráficos que faltam são desenhados em paralelo.
+
+FORMATS = ("html", "pdf", "png")
+DPI = 100
+# Mudou o desenho? Aumente para invalidar o cache
+RENDER_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                                 "autodiagnostico", "charts")
+ERROR_LABELS = {"conteudo": "Conteúdo", "atencao": "Atenção", "tempo": "Tempo"}
+KIND_TITLES = {"topics": "Tópicos de {}", "subtopics": "Subtópicos de {}"}
+KIND_STYLES = {"topics": TOPIC_STYLE, "subtopics": SUBTOPIC_STYLE}
+
+
+def chart_specs(summary):
+    # Gráficos de um resumo (AggregateIndex.as_dict): a pizza e, para cada
+    # matéria, tópicos e subtópicos
+    specs = [{"kind": "pie", "subject": None, "counts": summary["subjects"]}]
+    for subject, _ in sorted(summary["subjects"].items(), key=lambda x: x[1], reverse=True):
+        for kind in ("topics", "subtopics"):
+            specs.append({"kind": kind, "subject": subject, "counts": summary[kind][subject]})
+    return specs
+
+
+def chart_key(spec):
+    data = [RENDER_VERSION, DPI, spec["kind"], spec["subject"], sorted(spec["counts"].items())]
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+
+
+def render_chart(spec, filepath):
+    # Roda nos processos do pool: só Figure + Agg, sem pyplot nem Tk
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if spec["kind"] == "pie":
+        fig = Figure(figsize=(5, 3), dpi=DPI)
+        FigureCanvasAgg(fig)
+        draw_pie(fig.add_subplot(111), spec["counts"])
+        fig.tight_layout(pad=0)
+    else:
+        names, values = ordered_counts(spec["counts"])
+        fig = Figure(figsize=(7, figure_height(len(names))), dpi=DPI)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        draw_bars(ax, names, values, **KIND_STYLES[spec["kind"]])
+        ax.set_title(KIND_TITLES[spec["kind"]].format(spec["subject"]), fontsize=12, fontweight='bold')
+        fig.tight_layout()
+
+    # Grava num temporário e renomeia: outro relatório pode ler o cache ao mesmo tempo
+    fd, tmp_path = tempfile.mkstemp(suffix='.png', dir=os.path.dirname(filepath))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            fig.savefig(f, format='png')
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return filepath
+
+
+def _render_task(task):
+    return render_chart(*task)
+
+
+def render_charts(specs, cache_dir, workers=None):
+    # Devolve {chave: caminho do PNG}, desenhando só o que não está no cache
+    os.makedirs(cache_dir, exist_ok=True)
+    images = {}
+    missing = {}
+    for spec in specs:
+        key = chart_key(spec)
+        path = os.path.join(cache_dir, key + '.png')
+        images[key] = path
+        if key not in missing and not os.path.exists(path):
+            missing[key] = (spec, path)
+
+    tasks = list(missing.values())
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            _render_task(task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return images, {"charts": len(images), "rendered": len(tasks), "cached": len(images) - len(tasks)}
+
+
+def slug(text):
+    return re.sub(r"[^\w]+", "_", text or "").strip("_") or "grafico"
+
+
+def chart_filename(position, spec):
+    if spec["kind"] == "pie":
+        return f"{position:02d}_materias.png"
+    prefix = "topicos" if spec["kind"] == "topics" else "subtopicos"
+    return f"{position:02d}_{prefix}_{slug(spec['subject'])}.png"
+
+
+# ---------- montagem ----------
+
+def summary_rows(summary):
+    rows = []
+    for subject, count in sorted(summary["subjects"].items(), key=lambda x: x[1], reverse=True):
+        erros = summary["subject_errors"].get(subject, {})
+        rows.append([subject, count] + [erros.get(tipo, 0) for tipo in ERROR_TYPES])
+    rows.append(["Total", summary["total"]] + [summary["errors"][tipo] for tipo in ERROR_TYPES])
+    return rows
+
+
+def write_html(filepath, title, summary, specs, images):
+    # Um arquivo só, com as imagens embutidas: abre e imprime em qualquer navegador
+    def image(spec):
+        with open(images[chart_key(spec)], 'rb') as f:
+            data = base64.b64encode(f.read()).decode('ascii')
+        return f'<img src="data:image/png;base64,{data}" alt="">'
+
+    header = "".join(f"<th>{html.escape(h)}</th>" for h in
+                     ["Matéria", "Questões"] + [ERROR_LABELS[tipo] for tipo in ERROR_TYPES])
+    body = "".join("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>"
+                   for row in summary_rows(summary))
+    parts = [
+        "<!DOCTYPE html>",
+        '<html lang="pt-BR"><head><meta charset="utf-8">',
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:Arial,sans-serif;margin:2em}table{border-collapse:collapse}"
+        "td,th{border:1px solid #999;padding:4px 8px;text-align:right}td:first-child,th:first-child{text-align:left}"
+        "img{max-width:100%}section{page-break-inside:avoid}.subject{page-break-before:always}</style>",
+        "</head><body>",
+        f"<h1>Diagnóstico ENEM — {html.escape(title)}</h1>",
+        f"<p>{summary['total']} questões registradas.</p>",
+        f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>",
+    ]
+    for spec in specs:
+        if spec["kind"] == "pie":
+            parts.append(f"<section>{image(spec)}</section>")
+        elif spec["kind"] == "topics":
+            parts.append(f'<section class="subject"><h2>{html.escape(spec["subject"])}</h2>{image(spec)}</section>')
+        else:
+            parts.append(f"<section>{image(spec)}</section>")
+    parts.append("</body></html>")
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write("\n".join(parts))
+
+
+def write_pdf(filepath, title, summary, specs, images):
+    # Uma página A4 com o resumo e a pizza; depois uma página por matéria
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    from matplotlib.image import imread
+
+    def add_image(fig, spec, rect):
+        ax = fig.add_axes(rect)
+        ax.imshow(imread(images[chart_key(spec)]))
+        ax.set_axis_off()
+
+    with PdfPages(filepath) as pdf:
+        fig = Figure(figsize=(8.27, 11.69))
+        fig.text(0.5, 0.95, f"Diagnóstico ENEM — {title}", ha='center', fontsize=16, fontweight='bold')
+        fig.text(0.5, 0.92, f"{summary['total']} questões registradas", ha='center', fontsize=10)
+        table_ax = fig.add_axes([0.08, 0.55, 0.84, 0.33])
+        table_ax.set_axis_off()
+        table_ax.table(cellText=summary_rows(summary),
+                       colLabels=["Matéria", "Questões"] + [ERROR_LABELS[tipo] for tipo in ERROR_TYPES],
+                       loc='upper center')
+        add_image(fig, specs[0], [0.1, 0.08, 0.8, 0.45])
+        pdf.savefig(fig)
+
+        charts = specs[1:]
+        for i in range(0, len(charts), 2):
+            fig = Figure(figsize=(8.27, 11.69))
+            for j, spec in enumerate(charts[i:i + 2]):
+                add_image(fig, spec, [0.05, 0.52 - j * 0.48, 0.9, 0.44])
+            pdf.savefig(fig)
+
+
+def write_pngs(directory, specs, images):
+    os.makedirs(directory, exist_ok=True)
+    for position, spec in enumerate(specs):
+        shutil.copyfile(images[chart_key(spec)], os.path.join(directory, chart_filename(position, spec)))
+
+
+def output_path(source, output, fmt, many):
+    # Vários alunos, ou PNG: "output" é uma pasta com um item por aluno
+    stem = os.path.splitext(os.path.basename(source))[0]
+    if fmt == "png":
+        return os.path.join(output, stem) if many else output
+    if many or os.path.isdir(output):
+        return os.path.join(output, f"{stem}.{fmt}")
+    return output
+
+
+def generate_reports(summaries, output, fmt, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    # summaries: [(arquivo do aluno, AggregateIndex.as_dict())]
+    specs_by_source = [(source, summary, chart_specs(summary)) for source, summary in summaries]
+    all_specs = [spec for _, _, specs in specs_by_source for spec in specs]
+    images, stats = render_charts(all_specs, cache_dir, workers)
+
+    many = len(summaries) > 1
+    if many and fmt != "png":
+        os.makedirs(output, exist_ok=True)
+    written = []
+    for source, summary, specs in specs_by_source:
+        path = output_path(source, output, fmt, many)
+        if fmt == "html":
+            write_html(path, source, summary, specs, images)
+        elif fmt == "pdf":
+            write_pdf(path, source, summary, specs, images)
+        else:
+            write_pngs(path, specs, images)
+        written.append(path)
+    return written, stats
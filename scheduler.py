@@ -0,0 +1,37 @@
+ALL = None
+
+
+class RefreshScheduler:
+    # Junta as atualizações de tela pedidas em sequência numa só. Cada
+    # alteração marca quais telas (e quais matérias) ficaram desatualizadas;
+    # depois de "delay" ms, quando o Tk estiver ocioso, cada tela é
+    # redesenhada uma única vez com as matérias acumuladas.
+
+    def __init__(self, root, handlers, delay=50):
+        self.root = root
+        self.handlers = handlers    # nome da tela -> função(matérias ou None)
+        self.delay = delay
+        self.dirty = {}
+        self.timer = None
+        self.idle = None
+
+    def mark(self, *views, subjects=ALL):
+        for view in views:
+            if subjects is ALL or self.dirty.get(view, set()) is ALL:
+                self.dirty[view] = ALL
+            else:
+                self.dirty.setdefault(view, set()).update(subjects)
+        if self.timer is None and self.idle is None:
+            self.timer = self.root.after(self.delay, self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self.idle = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.idle = None
+        dirty, self.dirty = self.dirty, {}
+        # A ordem dos handlers é a ordem de atualização
+        for view, handler in self.handlers.items():
+            if view in dirty:
+                handler(dirty[view])
@@ -0,0 +1,125 @@
+import bisect
+import functools
+import re
+import unicodedata
+from collections import defaultdict
+
+from aggregates import ERROR_TYPES, NO_SUBTOPIC
+
+TOKEN_RE = re.compile(r"\w+")
+# Acentos separados pela normalização NFKD
+COMBINING_RE = re.compile("[\u0300-\u036f]")
+FACETS = ("subject", "topic", "subtopic")
+
+
+@functools.lru_cache(maxsize=4096)
+def fold_key(text):
+    # Matérias, tópicos e subtópicos se repetem muito: vale guardar
+    return fold(text)
+
+
+def fold(text):
+    # "Atenção" e "atencao" viram a mesma chave
+    text = text or ""
+    if not text.isascii():
+        text = COMBINING_RE.sub("", unicodedata.normalize("NFKD", text))
+    return text.casefold().strip()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    # Índice invertido das questões: para cada valor de filtro (matéria,
+    # tópico, subtópico, tipo de erro) e para cada palavra da descrição, o
+    # conjunto de ids. Um filtro é a interseção desses conjuntos.
+
+    def __init__(self, questions=()):
+        self.facets = {facet: defaultdict(set) for facet in FACETS}
+        self.errors = defaultdict(set)
+        self.terms = defaultdict(set)
+        self._sorted_terms = None
+        for q in questions:
+            self.add(q)
+
+    def _keys(self, question):
+        return {
+            "subject": fold_key(question["subject"]),
+            "topic": fold_key(question["topic"]),
+            "subtopic": fold_key(question["subtopic"] or NO_SUBTOPIC),
+        }
+
+    def add(self, question):
+        question_id = question["id"]
+        for facet, key in self._keys(question).items():
+            self.facets[facet][key].add(question_id)
+        erros = question.get("erros") or {}
+        for tipo in ERROR_TYPES:
+            if erros.get(tipo):
+                self.errors[tipo].add(question_id)
+        for term in set(tokenize(question["description"])):
+            if term not in self.terms:
+                self._sorted_terms = None
+            self.terms[term].add(question_id)
+
+    def remove(self, question):
+        question_id = question["id"]
+        for facet, key in self._keys(question).items():
+            _discard(self.facets[facet], key, question_id)
+        for tipo in ERROR_TYPES:
+            _discard(self.errors, tipo, question_id)
+        for term in set(tokenize(question["description"])):
+            if _discard(self.terms, term, question_id):
+                self._sorted_terms = None
+
+    def _prefix_ids(self, prefix):
+        # A última palavra digitada vale como prefixo ("fun" acha "funções")
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.terms)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        ids = set()
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            ids |= self.terms[term]
+        return ids
+
+    def search(self, text="", subject=None, topic=None, subtopic=None, errors=()):
+        # Devolve o conjunto de ids que passam em todos os filtros, ou None se
+        # nenhum filtro estiver ativo
+        sets = []
+        for facet, value in (("subject", subject), ("topic", topic), ("subtopic", subtopic)):
+            if value:
+                sets.append(self.facets[facet].get(fold_key(value), set()))
+        for tipo in errors:
+            sets.append(self.errors.get(tipo, set()))
+
+        words = tokenize(text)
+        for word in words[:-1]:
+            sets.append(self.terms.get(word, set()))
+        if words:
+            sets.append(self._prefix_ids(words[-1]))
+
+        if not sets:
+            return None
+        # Começa pelo menor conjunto para a interseção ser barata
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+
+def _discard(mapping, key, question_id):
+    # Tira o id do conjunto e apaga a chave vazia; devolve True se apagou
+    ids = mapping.get(key)
+    if ids is None:
+        return False
+    ids.discard(question_id)
+    if not ids:
+        del mapping[key]
+        return True
+    return False
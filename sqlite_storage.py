@@ -0,0 +1,278 @@
+import os
+import sqlite3
+import threading
+
+from aggregates import ERROR_TYPES, NO_SUBTOPIC, AggregateIndex
+from core import file_timestamp, fill_created_at
+from profiling import timed
+from storage import JournalStorage
+from writer import BackgroundWriter
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    subtopic TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    conteudo INTEGER NOT NULL DEFAULT 0,
+    atencao INTEGER NOT NULL DEFAULT 0,
+    tempo INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS questions_subject_topic ON questions (subject, topic);
+CREATE INDEX IF NOT EXISTS questions_subject_subtopic ON questions (subject, subtopic);
+CREATE INDEX IF NOT EXISTS questions_conteudo ON questions (subject) WHERE conteudo = 1;
+CREATE INDEX IF NOT EXISTS questions_atencao ON questions (subject) WHERE atencao = 1;
+CREATE INDEX IF NOT EXISTS questions_tempo ON questions (subject) WHERE tempo = 1;
+"""
+
+COLUMNS = "id, subject, topic, subtopic, description, conteudo, atencao, tempo, created_at"
+# Bancos criados antes da data de cadastro não têm a coluna; lidos assim
+OLD_COLUMNS = COLUMNS.replace("created_at", "'' AS created_at")
+# Reenviar uma questão com o mesmo id atualiza a linha sem mudar a ordem
+UPSERT = f"""
+INSERT INTO questions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    subject = excluded.subject, topic = excluded.topic, subtopic = excluded.subtopic,
+    description = excluded.description, conteudo = excluded.conteudo,
+    atencao = excluded.atencao, tempo = excluded.tempo, created_at = excluded.created_at
+"""
+
+
+def is_sqlite_path(path):
+    return os.path.splitext(path)[1].lower() in SQLITE_SUFFIXES
+
+
+def question_values(question):
+    erros = question.get("erros") or {}
+    return (
+        question["id"], question["subject"], question["topic"], question.get("subtopic") or "",
+        question.get("description") or "", *(int(bool(erros.get(tipo))) for tipo in ERROR_TYPES),
+        question.get("created_at") or "",
+    )
+
+
+def question_from_values(row):
+    question_id, subject, topic, subtopic, description, *flags, created_at = row
+    return {
+        "subject": subject,
+        "topic": topic,
+        "subtopic": subtopic,
+        "description": description,
+        "erros": {tipo: bool(flag) for tipo, flag in zip(ERROR_TYPES, flags)},
+        "id": question_id,
+        "created_at": created_at,
+    }
+
+
+def has_column(conn, name):
+    return any(row[1] == name for row in conn.execute("PRAGMA table_info(questions)"))
+
+
+def migrate_schema(conn, default_time):
+    # Bancos antigos ganham a coluna created_at; as questões que já estavam
+    # lá ficam com a data do arquivo. O CREATE TABLE do SCHEMA não altera
+    # uma tabela existente, por isso o ALTER TABLE.
+    if has_column(conn, "created_at"):
+        return
+    with conn:
+        conn.execute("ALTER TABLE questions ADD COLUMN created_at TEXT NOT NULL DEFAULT ''")
+        conn.execute("UPDATE questions SET created_at = ?", (default_time,))
+
+
+class SqliteStorage:
+    # Mesma interface do JournalStorage, gravando num banco SQLite em modo WAL.
+    # Cada add/delete é uma transação curta e o WAL garante o arquivo íntegro
+    # depois de uma queda, sem snapshot nem compactação. Contagens (GROUP BY)
+    # e páginas (keyset pela coluna "seq") saem do banco sem carregar as
+    # questões na memória.
+    # Com async_writes=True as transações rodam numa thread própria, como o
+    # journal; close() espera a fila esvaziar. Aqui não há snapshot que
+    # regrave tudo da memória: uma transação que falhou é tentada de novo e,
+    # se ainda falhar, compact()/close() levantam o erro.
+
+    def __init__(self, path, read_only=False, async_writes=False):
+        self.path = path
+        self.read_only = read_only
+        self.async_writes = async_writes
+        self._writer = BackgroundWriter(lambda item: self._execute(*item), "no banco")
+        self._lock = threading.Lock()
+        self._conn = None
+        self._columns = COLUMNS
+        self._default_time = None
+
+    def _connect(self):
+        # Uma conexão só, usada por várias threads sempre sob self._lock
+        if self._conn is not None:
+            return self._conn
+        if self.read_only and not os.path.exists(self.path):
+            # Como no JSON: arquivo inexistente é um conjunto vazio
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.executescript(SCHEMA)
+        elif self.read_only:
+            uri = "file:" + os.path.abspath(self.path) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            # Banco antigo aberto só para leitura: as datas são preenchidas em load()
+            if not has_column(conn, "created_at"):
+                self._columns = OLD_COLUMNS
+        else:
+            migration_time = file_timestamp(self.path)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Em WAL, NORMAL não perde a integridade numa queda, só a última transação
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'questions'").fetchone():
+                migrate_schema(conn, migration_time)
+            conn.executescript(SCHEMA)
+        self._conn = conn
+        return conn
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    # ---------- leitura ----------
+
+    @timed("storage_load")
+    def load(self):
+        questions = []
+        for page, _ in self.iter_pages():
+            questions.extend(page)
+        return questions
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM questions")[0][0]
+
+    def page(self, limit=PAGE_SIZE, after=0):
+        # Paginação por keyset: as questões depois de "after" (seq), em ordem
+        # de cadastro. Devolve (questões, último seq) para pedir a próxima.
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(f"SELECT seq, {self._columns} FROM questions WHERE seq > ? ORDER BY seq LIMIT ?",
+                                (after, limit)).fetchall()
+        last = rows[-1][0] if rows else after
+        return self._questions(row[1:] for row in rows), last
+
+    def _questions(self, rows):
+        # Datas ausentes (banco antigo só de leitura) ou inválidas (editadas à
+        # mão) ficam com a data do arquivo, como na migração
+        questions = [question_from_values(row) for row in rows]
+        if self._default_time is None:
+            self._default_time = file_timestamp(self.path)
+        fill_created_at(questions, self._default_time)
+        return questions
+
+    def iter_pages(self, limit=PAGE_SIZE):
+        after = 0
+        while True:
+            questions, after = self.page(limit, after)
+            if not questions:
+                return
+            yield questions, after
+
+    def iter_questions(self, limit=PAGE_SIZE):
+        for questions, _ in self.iter_pages(limit):
+            yield from questions
+
+    @timed("sqlite_aggregate")
+    def aggregate_index(self):
+        # As mesmas contagens do AggregateIndex, calculadas com GROUP BY
+        index = AggregateIndex()
+        for subject, count in self._query("SELECT subject, COUNT(*) FROM questions GROUP BY subject"):
+            index.subjects[subject] = count
+        for subject, topic, count in self._query(
+                "SELECT subject, topic, COUNT(*) FROM questions GROUP BY subject, topic"):
+            index.topics[subject][topic] = count
+        for subject, subtopic, count in self._query(
+                "SELECT subject, CASE WHEN subtopic = '' THEN ? ELSE subtopic END, COUNT(*) "
+                "FROM questions GROUP BY 1, 2", (NO_SUBTOPIC,)):
+            index.subtopics[subject][subtopic] += count
+        for tipo in ERROR_TYPES:
+            # Cada consulta usa o índice parcial do tipo de erro
+            for subject, count in self._query(
+                    f"SELECT subject, COUNT(*) FROM questions WHERE {tipo} = 1 GROUP BY subject"):
+                index.subject_errors[subject][tipo] = count
+                index.errors[tipo] += count
+        return index
+
+    # ---------- escrita ----------
+
+    def add(self, question):
+        self.add_many([question])
+
+    def add_many(self, questions):
+        self._submit(UPSERT, [question_values(q) for q in questions])
+
+    def delete(self, question_id):
+        self.delete_many([question_id])
+
+    def delete_many(self, question_ids):
+        self._submit("DELETE FROM questions WHERE id = ?", [(i,) for i in question_ids])
+
+    def _submit(self, sql, rows):
+        self._check_writable()
+        if not rows:
+            return
+        if self.async_writes:
+            self._writer.submit((sql, rows))
+        else:
+            self._execute(sql, rows)
+
+    def _execute(self, sql, rows):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(sql, rows)
+
+    def drain(self):
+        self._writer.drain()
+
+    def needs_compaction(self):
+        # O SQLite reaproveita o espaço sozinho; não há snapshot para refazer
+        return False
+
+    def compact(self, questions, background=True):
+        # Nada a reescrever: só leva o WAL para o arquivo principal ao salvar
+        self._check_writable()
+        self.drain()
+        if not background:
+            with self._lock:
+                self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"{self.path} foi aberto somente para leitura")
+
+    def close(self):
+        # Um erro da thread de escrita sobe depois de fechar a conexão
+        try:
+            self._writer.close()
+        finally:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+
+def migrate_json(json_path, db_path):
+    # Migração única: snapshot + journal do JSON viram um banco novo. O banco
+    # é montado num arquivo temporário e só então renomeado, e o JSON fica
+    # intacto como cópia de segurança.
+    questions = JournalStorage(json_path, read_only=True).load()
+    tmp_path = db_path + ".tmp"
+    for leftover in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    storage = SqliteStorage(tmp_path)
+    try:
+        storage.add_many(questions)
+        storage.compact(questions, background=False)
+    finally:
+        storage.close()
+    os.replace(tmp_path, db_path)
+    return len(questions)
@@ -0,0 +1,226 @@
+import json
+import os
+import tempfile
+import threading
+
+from core import file_timestamp, fill_created_at, new_id
+from profiling import timed
+from writer import BackgroundWriter
+
+SNAPSHOT_VERSION = 1
+
+
+class JournalStorage:
+    # Persistência em duas partes:
+    #   - snapshot (enem_data.json): todas as questões até um número de sequência
+    #   - journal (enem_data.journal): uma linha JSON por alteração, só acrescentada
+    # Adicionar ou excluir custa O(1) em disco; de tempos em tempos o journal é
+    # compactado num novo snapshot em segundo plano.
+    # Com async_writes=True as linhas do journal são gravadas por uma thread
+    # própria; close() espera a fila esvaziar e faz fsync antes de sair.
+
+    def __init__(self, path='enem_data.json', compact_threshold=500, read_only=False, async_writes=False):
+        self.path = path
+        self.read_only = read_only
+        self.async_writes = async_writes
+        self._writer = BackgroundWriter(self._write_entries, "o journal")
+        self.journal_path = os.path.splitext(path)[0] + '.journal'
+        self.old_journal_path = self.journal_path + '.old'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._journal = None
+        self._seq = 0
+        self._pending = 0
+        self._compactor = None
+
+    # ---------- leitura ----------
+
+    @timed("storage_load")
+    def load(self):
+        # Lida antes de gravar qualquer coisa: é a data das questões sem data
+        migration_time = file_timestamp(self.path if os.path.exists(self.path) else self.journal_path)
+        questions, snapshot_seq = self._read_snapshot()
+        self._seq = snapshot_seq
+        self._pending = 0
+
+        # Questões antigas ainda não têm id: recebem um agora
+        migrated = False
+        by_id = {}
+        for q in questions:
+            if not q.get("id"):
+                q["id"] = new_id()
+                migrated = True
+            by_id[q["id"]] = q
+
+        # O journal antigo só existe se uma compactação foi interrompida
+        for journal in (self.old_journal_path, self.journal_path):
+            for entry in self._read_journal(journal):
+                if entry["seq"] <= snapshot_seq:
+                    continue
+                self._apply(by_id, entry)
+                self._seq = max(self._seq, entry["seq"])
+                self._pending += 1
+        questions = list(by_id.values())
+        # Questões de antes da data de cadastro ficam com a data do arquivo
+        if fill_created_at(questions, migration_time):
+            migrated = True
+
+        # Grava os ids e datas novos e termina a compactação interrompida antes de
+        # aceitar novas alterações
+        if not self.read_only and (migrated or os.path.exists(self.old_journal_path)):
+            self._write_snapshot(questions, self._seq)
+            self._pending = 0
+        return questions
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return [], 0
+        if not content.strip():
+            return [], 0
+        data = json.loads(content)
+
+        # Formato antigo: lista pura de questões
+        if isinstance(data, list):
+            return data, 0
+        return data.get("questions", []), data.get("seq", 0)
+
+    def _read_journal(self, journal):
+        try:
+            f = open(journal, 'r', encoding='utf-8')
+        except OSError:
+            return
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Última linha truncada por uma queda: ignora o resto
+                    break
+
+    def _apply(self, by_id, entry):
+        if entry["op"] == "add":
+            by_id[entry["q"]["id"]] = entry["q"]
+        elif entry["op"] == "del":
+            by_id.pop(entry["id"], None)
+
+    # ---------- escrita ----------
+
+    def add(self, question):
+        self._append([{"op": "add", "q": question}])
+
+    def add_many(self, questions):
+        self._append([{"op": "add", "q": q} for q in questions])
+
+    def delete(self, question_id):
+        self._append([{"op": "del", "id": question_id}])
+
+    def delete_many(self, question_ids):
+        self._append([{"op": "del", "id": i} for i in question_ids])
+
+    def _append(self, entries):
+        self._check_writable()
+        if not entries:
+            return
+        with self._lock:
+            for entry in entries:
+                self._seq += 1
+                entry["seq"] = self._seq
+            self._pending += len(entries)
+
+        if self.async_writes:
+            self._writer.submit(entries)
+        else:
+            self._write_entries(entries)
+
+    def _write_entries(self, entries):
+        lines = [json.dumps(entry, separators=(',', ':')) for entry in entries]
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write("\n".join(lines) + "\n")
+            self._journal.flush()
+
+    def drain(self):
+        # Espera a thread de escrita gravar tudo o que já foi pedido
+        self._writer.drain()
+
+    def needs_compaction(self):
+        return self._pending >= self.compact_threshold
+
+    def compact(self, questions, background=True):
+        # A cópia rasa é feita aqui (na thread da UI); o resto pode rodar em
+        # paralelo porque as questões salvas não são alteradas depois.
+        self._check_writable()
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        try:
+            self.drain()
+        except Exception as e:
+            # O journal não grava: o snapshot sai da memória e cobre o que falhou
+            print(f"Erro ao gravar o journal ({e}); gravando um snapshot completo")
+            background = False
+        with self._lock:
+            snapshot = list(questions)
+            seq = self._seq
+            # Novas alterações passam a ir para um journal novo
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            # Se sobrou um journal antigo (compactação anterior falhou), não
+            # pode ser sobrescrito: grava o snapshot aqui mesmo
+            if os.path.exists(self.old_journal_path):
+                background = False
+            elif os.path.exists(self.journal_path):
+                os.replace(self.journal_path, self.old_journal_path)
+            self._pending = 0
+
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot, args=(snapshot, seq), daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot(snapshot, seq)
+            self._writer.discard()
+
+    @timed("storage_snapshot")
+    def _write_snapshot(self, questions, seq):
+        # Escrita atômica: arquivo temporário no mesmo diretório + rename
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.enem_data.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": SNAPSHOT_VERSION, "seq": seq, "questions": questions}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        # O snapshot já contém tudo até "seq"; o journal antigo pode sumir
+        try:
+            os.remove(self.old_journal_path)
+        except OSError:
+            pass
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"{self.path} foi aberto somente para leitura")
+
+    def close(self):
+        # Um erro da thread de escrita sobe depois de fechar o journal
+        try:
+            self._writer.close()
+        finally:
+            if self._compactor is not None:
+                self._compactor.join()
+            with self._lock:
+                if self._journal is not None:
+                    self._journal.flush()
+                    os.fsync(self._journal.fileno())
+                    self._journal.close()
+                    self._journal = None
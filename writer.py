@@ -0,0 +1,70 @@
+import queue
+import threading
+
+
+class BackgroundWriter:
+    # Fila + thread de escrita usada pelos armazenamentos com async_writes:
+    # submit() só enfileira e volta na hora; a thread chama write(item) na
+    # ordem em que os itens chegaram. Sem async_writes, os armazenamentos
+    # chamam write() direto e este objeto não é criado.
+    #
+    # Um item que falha (ex.: banco travado por outro programa) não é
+    # descartado: fica em "failed" e é tentado de novo antes dos próximos,
+    # para a ordem não mudar (uma exclusão não pode passar na frente da
+    # inclusão). drain() e close() tentam uma última vez e levantam o erro se
+    # ainda houver itens pendentes, para quem fecha o arquivo poder avisar.
+
+    def __init__(self, write, label):
+        self.write = write
+        self.label = label
+        self.failed = []
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        self._queue.put(item)
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                with self._lock:
+                    self.failed.append(item)
+                    self._write_failed()
+            except Exception as e:
+                print(f"Erro ao gravar {self.label}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write_failed(self):
+        # Grava os pendentes em ordem; para no primeiro que falhar
+        while self.failed:
+            self.write(self.failed[0])
+            self.failed.pop(0)
+
+    def drain(self):
+        # Espera a thread gravar tudo o que já foi pedido e tenta de novo o
+        # que falhou; se ainda falhar, o erro sobe para quem chamou
+        if self._thread is not None:
+            self._queue.join()
+        with self._lock:
+            self._write_failed()
+
+    def discard(self):
+        # O chamador já gravou tudo de outro jeito (ex.: snapshot completo)
+        with self._lock:
+            self.failed = []
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._write_failed()